@@ -7,9 +7,11 @@ Usage:
   python analyze_h2_5reps.py --no-fetch   # analyze from cached counts
 """
 
-import json
+import re
 import sys
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scipy.linalg import lu_factor, lu_solve
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -18,17 +20,34 @@ Q0_POS = 4  # q4 position in 9-bit MSB-first bitstring
 Q1_POS = 2  # q6 position
 N_REPS = 5
 RESULTS_DIR = Path("experiments/results")
+P4_CACHE = RESULTS_DIR / "h2-5rep-p4.npz"  # parsed 2-qubit probabilities per job
+# Rows: Z0, Z1, Z0Z1 eigenvalue signs over outcomes [00, 01, 10, 11]
+_SIGN = np.array([[1, 1, -1, -1],
+                  [1, -1, 1, -1],
+                  [1, -1, -1, 1]])
+_STATUS_RE = re.compile(r"COMPLETED|RUNNING|PLANNED|FAILED|ERROR")
+
+# Shared QI fetch/poll helpers live next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from qi_fetch import (FETCH_WORKERS, bit_matrix, fetch_one, get_backend, load_json, poll_status,
+                      save_json)
+
+
+def counts_to_p4(counts, pos0=Q0_POS, pos1=Q1_POS):
+    """Collapse 9-bit counts to the 2-qubit outcome distribution.
+
+    Returns (probs, n_shots) with probs = [P00, P01, P10, P11].
+    """
+    bits = bit_matrix(counts)
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    c4 = np.bincount((bits[:, pos0] << 1) | bits[:, pos1], weights=weights, minlength=4)
+    n = c4.sum()
+    return c4 / n, int(n)
 
 
 def extract_2q_probs(counts, pos0=Q0_POS, pos1=Q1_POS):
     """Extract 2-qubit probability vector from 9-bit counts."""
-    total = sum(counts.values())
-    probs = np.zeros(4)
-    for bitstring, count in counts.items():
-        b0 = int(bitstring[pos0])
-        b1 = int(bitstring[pos1])
-        probs[b0 * 2 + b1] += count
-    return probs / total
+    return counts_to_p4(counts, pos0, pos1)[0]
 
 
 def build_confusion_matrix(cal_counts):
@@ -40,11 +59,8 @@ def build_confusion_matrix(cal_counts):
 
 
 def expval_from_probs(probs):
-    """Compute Z0, Z1, Z0Z1 from probability vector [P00, P01, P10, P11]."""
-    z0 = (probs[0] + probs[1]) - (probs[2] + probs[3])
-    z1 = (probs[0] + probs[2]) - (probs[1] + probs[3])
-    zz = (probs[0] + probs[3]) - (probs[1] + probs[2])
-    return z0, z1, zz
+    """Compute [Z0, Z1, Z0Z1] from probability vector [P00, P01, P10, P11]."""
+    return _SIGN @ probs
 
 
 def compute_energy(g0, g1, g4, z0, z1, xx, yy):
@@ -52,86 +68,98 @@ def compute_energy(g0, g1, g4, z0, z1, xx, yy):
     return g0 + g1 * (z0 - z1) + g4 * (xx + yy)
 
 
-def rem_energy_from_counts(counts_z, counts_x, counts_y, M_inv, g0, g1, g4):
-    """Full pipeline: raw counts → REM-corrected energy."""
-    raw_z = extract_2q_probs(counts_z)
-    raw_x = extract_2q_probs(counts_x)
-    raw_y = extract_2q_probs(counts_y)
+def rem_energy_from_probs(raw_z, raw_x, raw_y, M_lu, g0, g1, g4):
+    """Full pipeline: raw 2-qubit probabilities → REM-corrected energy.
 
-    corr_z = np.maximum(M_inv @ raw_z, 0); corr_z /= corr_z.sum()
-    corr_x = np.maximum(M_inv @ raw_x, 0); corr_x /= corr_x.sum()
-    corr_y = np.maximum(M_inv @ raw_y, 0); corr_y /= corr_y.sum()
+    M_lu is the LU factorization of the confusion matrix (scipy lu_factor).
+    """
+    # Columns are the Z, X, Y bases; correct all three in one solve
+    raw = np.column_stack([raw_z, raw_x, raw_y])
+    corr = np.maximum(lu_solve(M_lu, raw), 0)
+    corr /= corr.sum(axis=0, keepdims=True)
 
-    z0, z1, z0z1 = expval_from_probs(corr_z)
-    _, _, xx = expval_from_probs(corr_x)
-    _, _, yy = expval_from_probs(corr_y)
-
-    energy = compute_energy(g0, g1, g4, z0, z1, xx, yy)
-
-    # Also compute raw energy
-    rz0, rz1, _ = expval_from_probs(raw_z)
-    _, _, rxx = expval_from_probs(raw_x)
-    _, _, ryy = expval_from_probs(raw_y)
-    raw_energy = compute_energy(g0, g1, g4, rz0, rz1, rxx, ryy)
+    # Raw and corrected expectation values in one product:
+    # E[:, b] = [Z0, Z1, Z0Z1] of column b (raw Z, X, Y, then REM Z, X, Y)
+    E = expval_from_probs(np.hstack([raw, corr]))
+    raw_energy = compute_energy(g0, g1, g4, E[0, 0], E[1, 0], E[2, 1], E[2, 2])
+    energy = compute_energy(g0, g1, g4, E[0, 3], E[1, 3], E[2, 4], E[2, 5])
 
     return {
         "raw_energy": float(raw_energy),
         "rem_energy": float(energy),
-        "z0z1_raw": float((raw_z[0] + raw_z[3]) - (raw_z[1] + raw_z[2])),
-        "z0z1_rem": float(z0z1),
+        "z0z1_raw": float(E[2, 0]),
+        "z0z1_rem": float(E[2, 3]),
     }
 
 
+def save_p4_cache(probs):
+    """Store per-job 2-qubit probabilities so re-runs can skip parsing counts."""
+    np.savez_compressed(P4_CACHE, names=np.array(list(probs)),
+                        p4=np.array(list(probs.values())).reshape(-1, 4),
+                        qubit_pos=np.array([Q0_POS, Q1_POS]))
+
+
+def load_p4_cache(counts_file):
+    """Per-job probabilities from P4_CACHE, or None if missing or stale."""
+    if not P4_CACHE.exists() or P4_CACHE.stat().st_mtime < counts_file.stat().st_mtime:
+        return None
+    with np.load(P4_CACHE) as cache:
+        if cache["qubit_pos"].tolist() != [Q0_POS, Q1_POS]:
+            return None
+        return dict(zip(cache["names"].tolist(), cache["p4"]))
+
+
 # ── Fetch results ─────────────────────────────────────────────
 
+def _normalize_status(status):
+    """Reduce a raw job status (e.g. 'JobStatus.COMPLETED') to its keyword."""
+    m = _STATUS_RE.search(status)
+    return m.group(0) if m else status
+
+
 def fetch_results(job_ids_file):
     """Fetch all results from QI and cache locally."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-
-    with open(job_ids_file) as f:
-        data = json.load(f)
+    data = load_json(job_ids_file)
 
     job_ids = data["job_ids"]
-    backend = RemoteBackend()
+    backend = get_backend()
 
     all_counts = {}
     n_done = 0
     n_running = 0
     n_failed = 0
 
+    pending = {}
     for name, job_id in job_ids.items():
         if isinstance(job_id, str) and "FAILED" in job_id:
             n_failed += 1
-            continue
-
-        try:
-            job = backend.get_job(job_id)
-            status = str(getattr(job, "status", ""))
-
-            if "COMPLETED" in status:
-                raw = backend.get_results(job_id)
-                items = raw.items if hasattr(raw, "items") else raw
-                histogram = None
-                for item in items:
-                    if hasattr(item, "results") and item.results:
-                        histogram = item.results
-                        break
+        else:
+            pending[name] = job_id
+
+    # fetch_one asks for results first: one request per completed job, but
+    # two (get_results, then get_job) per job that is still running
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        fetched = ex.map(lambda job_id: fetch_one(backend, job_id), pending.values())
+        for (name, job_id), (status, histogram, error) in zip(pending.items(), fetched):
+            if error is not None:
+                print(f"  {name} (job {job_id}): error fetching: {error}")
+                n_failed += 1
+                continue
+            status = _normalize_status(status)
+            if status == "COMPLETED":
                 if histogram:
                     all_counts[name] = histogram
                     n_done += 1
                 else:
                     print(f"  {name} (job {job_id}): completed but no results")
                     n_failed += 1
-            elif "FAILED" in status or "ERROR" in status:
+            elif status in ("FAILED", "ERROR"):
                 print(f"  {name} (job {job_id}): {status}")
                 n_failed += 1
             else:
                 n_running += 1
                 if n_running <= 5:
                     print(f"  {name} (job {job_id}): {status}")
-        except Exception as e:
-            print(f"  {name} (job {job_id}): error fetching: {e}")
-            n_failed += 1
 
     print(f"\nFetch summary: {n_done} done, {n_running} running, {n_failed} failed")
 
@@ -140,8 +168,7 @@ def fetch_results(job_ids_file):
 
     # Cache
     cache_file = RESULTS_DIR / "h2-5rep-raw-counts.json"
-    with open(cache_file, "w") as f:
-        json.dump(all_counts, f)
+    save_json(cache_file, all_counts, indent=False)
     print(f"Cached {len(all_counts)} count dictionaries to {cache_file}")
 
     return all_counts, n_done, n_running
@@ -149,30 +176,26 @@ def fetch_results(job_ids_file):
 
 def check_status(job_ids_file):
     """Check status of all jobs without fetching results."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-
-    with open(job_ids_file) as f:
-        data = json.load(f)
+    data = load_json(job_ids_file)
 
     job_ids = data["job_ids"]
-    backend = RemoteBackend()
+    backend = get_backend()
 
     status_counts = {}
+    submitted = []
     for name, job_id in job_ids.items():
         if isinstance(job_id, str):
             status_counts["SUBMIT_FAILED"] = status_counts.get("SUBMIT_FAILED", 0) + 1
-            continue
-        try:
-            job = backend.get_job(job_id)
-            status = str(getattr(job, "status", "UNKNOWN"))
-            # Normalize
-            for s in ["COMPLETED", "RUNNING", "PLANNED", "FAILED", "ERROR"]:
-                if s in status:
-                    status = s
-                    break
+        else:
+            submitted.append(job_id)
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        for status, error in ex.map(lambda job_id: poll_status(backend, job_id), submitted):
+            if error is not None:
+                status_counts["FETCH_ERROR"] = status_counts.get("FETCH_ERROR", 0) + 1
+                continue
+            status = _normalize_status(status)
             status_counts[status] = status_counts.get(status, 0) + 1
-        except Exception:
-            status_counts["FETCH_ERROR"] = status_counts.get("FETCH_ERROR", 0) + 1
 
     total = sum(status_counts.values())
     print(f"Job status summary ({total} total):")
@@ -185,10 +208,17 @@ def check_status(job_ids_file):
 
 # ── Analysis ──────────────────────────────────────────────────
 
-def analyze(counts, distances, cal_counts):
-    """Compute per-rep and aggregate statistics."""
+# Per-rep quantities aggregated into mean ± std for each distance
+STAT_KEYS = ("raw_error_mHa", "rem_error_mHa", "raw_energy", "rem_energy", "z0z1_rem")
+
+
+def analyze(probs, distances, cal_counts):
+    """Compute per-rep and aggregate statistics.
+
+    probs maps job name -> 2-qubit probability vector (see counts_to_p4).
+    """
     M = build_confusion_matrix(cal_counts)
-    M_inv = np.linalg.inv(M)
+    M_lu = lu_factor(M)  # factor once, solve per rep instead of forming M^-1
     cond = np.linalg.cond(M)
 
     print(f"\nConfusion matrix condition: {cond:.2f}")
@@ -205,12 +235,12 @@ def analyze(counts, distances, cal_counts):
             x_key = f"rep{rep}_R{R:.3f}_X"
             y_key = f"rep{rep}_R{R:.3f}_Y"
 
-            if z_key not in counts or x_key not in counts or y_key not in counts:
+            if z_key not in probs or x_key not in probs or y_key not in probs:
                 continue
 
-            r = rem_energy_from_counts(
-                counts[z_key], counts[x_key], counts[y_key],
-                M_inv, g0, g1, g4
+            r = rem_energy_from_probs(
+                probs[z_key], probs[x_key], probs[y_key],
+                M_lu, g0, g1, g4
             )
             r["raw_error_mHa"] = abs(r["raw_energy"] - fci) * 1000
             r["rem_error_mHa"] = abs(r["rem_energy"] - fci) * 1000
@@ -221,27 +251,26 @@ def analyze(counts, distances, cal_counts):
             print(f"  R={R:.3f}: NO DATA")
             continue
 
-        raw_errors = [r["raw_error_mHa"] for r in rep_results]
-        rem_errors = [r["rem_error_mHa"] for r in rep_results]
-        rem_energies = [r["rem_energy"] for r in rep_results]
-        raw_energies = [r["raw_energy"] for r in rep_results]
-        z0z1_values = [r["z0z1_rem"] for r in rep_results]
+        # One (n_reps, 5) array; mean and sample std in two batched reductions
+        stats = np.array([[r[k] for k in STAT_KEYS] for r in rep_results])
+        mean = dict(zip(STAT_KEYS, stats.mean(axis=0).tolist()))
+        std = dict(zip(STAT_KEYS, stats.std(axis=0, ddof=1).tolist()))
 
         results_by_distance[R] = {
             "bond_distance": R,
             "fci_energy": fci,
             "hf_energy": d["hf"],
             "n_reps": len(rep_results),
-            "raw_energy_mean": float(np.mean(raw_energies)),
-            "raw_energy_std": float(np.std(raw_energies, ddof=1)),
-            "rem_energy_mean": float(np.mean(rem_energies)),
-            "rem_energy_std": float(np.std(rem_energies, ddof=1)),
-            "raw_error_mean_mHa": float(np.mean(raw_errors)),
-            "raw_error_std_mHa": float(np.std(raw_errors, ddof=1)),
-            "rem_error_mean_mHa": float(np.mean(rem_errors)),
-            "rem_error_std_mHa": float(np.std(rem_errors, ddof=1)),
-            "z0z1_mean": float(np.mean(z0z1_values)),
-            "z0z1_std": float(np.std(z0z1_values, ddof=1)),
+            "raw_energy_mean": mean["raw_energy"],
+            "raw_energy_std": std["raw_energy"],
+            "rem_energy_mean": mean["rem_energy"],
+            "rem_energy_std": std["rem_energy"],
+            "raw_error_mean_mHa": mean["raw_error_mHa"],
+            "raw_error_std_mHa": std["raw_error_mHa"],
+            "rem_error_mean_mHa": mean["rem_error_mHa"],
+            "rem_error_std_mHa": std["rem_error_mHa"],
+            "z0z1_mean": mean["z0z1_rem"],
+            "z0z1_std": std["z0z1_rem"],
             "per_rep": rep_results,
         }
 
@@ -250,53 +279,53 @@ def analyze(counts, distances, cal_counts):
 
 def print_report(results, cond):
     """Print formatted analysis report."""
-    print("\n" + "=" * 90)
-    print("H2 2-QUBIT VQE — TUNA-9 — 5 REPETITIONS WITH REM")
-    print("=" * 90)
-    print(f"Confusion matrix condition: {cond:.2f}")
-    print(f"Chemical accuracy threshold: 1.6 mHa (1.0 kcal/mol)")
-    print()
-
-    header = (f"{'R (Å)':>7} {'N':>3} {'Raw Mean':>10} {'Raw σ':>8} "
-              f"{'REM Mean':>10} {'REM σ':>8} {'<Z0Z1>':>8} {'Chem?':>6}")
-    print(header)
-    print("-" * 90)
-
-    all_rem_means = []
-    n_chem = 0
-    for R in sorted(results.keys()):
+    Rs = sorted(results)
+    lines = [
+        "\n" + "=" * 90,
+        "H2 2-QUBIT VQE — TUNA-9 — 5 REPETITIONS WITH REM",
+        "=" * 90,
+        f"Confusion matrix condition: {cond:.2f}",
+        f"Chemical accuracy threshold: 1.6 mHa (1.0 kcal/mol)",
+        "",
+        (f"{'R (Å)':>7} {'N':>3} {'Raw Mean':>10} {'Raw σ':>8} "
+         f"{'REM Mean':>10} {'REM σ':>8} {'<Z0Z1>':>8} {'Chem?':>6}"),
+        "-" * 90,
+    ]
+
+    rem_means = np.array([results[R]["rem_error_mean_mHa"] for R in Rs])
+    chem = rem_means < 1.6
+    for R, is_chem in zip(Rs, chem):
         r = results[R]
-        chem = r["rem_error_mean_mHa"] < 1.6
-        if chem:
-            n_chem += 1
-        all_rem_means.append(r["rem_error_mean_mHa"])
-        mark = "  ✓" if chem else ""
-        print(f"{R:>7.3f} {r['n_reps']:>3} "
-              f"{r['raw_error_mean_mHa']:>8.1f}±{r['raw_error_std_mHa']:<5.1f} "
-              f"{r['rem_error_mean_mHa']:>8.1f}±{r['rem_error_std_mHa']:<5.1f} "
-              f"{r['z0z1_mean']:>+.4f} {mark}")
-
-    print("-" * 90)
-    overall_mean = np.mean(all_rem_means)
-    print(f"Overall REM error: {overall_mean:.1f} mHa (mean across distances)")
-    print(f"Chemical accuracy: {n_chem}/{len(results)} distances")
-
-    # Per-rep breakdown
-    print(f"\n{'Per-rep REM errors (mHa)':>30}")
-    print(f"{'R (Å)':>7}", end="")
-    for rep in range(N_REPS):
-        print(f" {'Rep'+str(rep):>8}", end="")
-    print()
-    for R in sorted(results.keys()):
-        r = results[R]
-        print(f"{R:>7.3f}", end="")
-        for pr in r["per_rep"]:
-            print(f" {pr['rem_error_mHa']:>8.1f}", end="")
-        print()
+        mark = "  ✓" if is_chem else ""
+        lines.append(
+            f"{R:>7.3f} {r['n_reps']:>3} "
+            f"{r['raw_error_mean_mHa']:>8.1f}±{r['raw_error_std_mHa']:<5.1f} "
+            f"{r['rem_error_mean_mHa']:>8.1f}±{r['rem_error_std_mHa']:<5.1f} "
+            f"{r['z0z1_mean']:>+.4f} {mark}")
+
+    lines += [
+        "-" * 90,
+        f"Overall REM error: {np.mean(rem_means):.1f} mHa (mean across distances)",
+        f"Chemical accuracy: {int(chem.sum())}/{len(results)} distances",
+        # Per-rep breakdown
+        f"\n{'Per-rep REM errors (mHa)':>30}",
+        f"{'R (Å)':>7}" + "".join(f" {'Rep'+str(rep):>8}" for rep in range(N_REPS)),
+    ]
+    for R in Rs:
+        lines.append(f"{R:>7.3f}" + "".join(
+            f" {pr['rem_error_mHa']:>8.1f}" for pr in results[R]["per_rep"]))
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def save_results(results, M, cond, cal_source, distances):
     """Save full analysis + website-ready sweep data."""
+    # Split the per-rep lists from the summaries in one pass
+    summaries, per_rep = {}, {}
+    for R, r in results.items():
+        summary = dict(r)
+        per_rep[str(R)] = summary.pop("per_rep")
+        summaries[str(R)] = summary
+
     # Full analysis JSON
     analysis = {
         "experiment": "H2 2-qubit VQE 5-rep statistical run",
@@ -311,21 +340,19 @@ def save_results(results, M, cond, cal_source, distances):
         "confusion_matrix": M.tolist(),
         "confusion_matrix_condition": round(cond, 2),
         "analyzed": datetime.now(timezone.utc).isoformat(),
-        "results": {str(R): {k: v for k, v in r.items() if k != "per_rep"}
-                    for R, r in results.items()},
-        "per_rep_results": {str(R): r["per_rep"] for R, r in results.items()},
+        "results": summaries,
+        "per_rep_results": per_rep,
     }
 
     analysis_file = RESULTS_DIR / "h2-2qubit-vqe-tuna9-5rep-analysis.json"
-    with open(analysis_file, "w") as f:
-        json.dump(analysis, f, indent=2)
+    save_json(analysis_file, analysis)
     print(f"\nFull analysis saved to: {analysis_file}")
 
     # Website-ready sweep data (matches SweepPoint interface)
+    alpha_by_R = {d["R"]: d["alpha"] for d in distances}
     sweep = []
     for R in sorted(results.keys()):
         r = results[R]
-        d = next(d for d in distances if d["R"] == R)
         sweep.append({
             "bond_distance": R,
             "energy_measured": round(r["rem_energy_mean"], 6),
@@ -336,15 +363,14 @@ def save_results(results, M, cond, cal_source, distances):
             "error_std_kcal": round(r["rem_error_std_mHa"] * 0.627509, 2),
             "error_mHa": round(r["rem_error_mean_mHa"], 1),
             "error_std_mHa": round(r["rem_error_std_mHa"], 1),
-            "alpha": d["alpha"],
+            "alpha": alpha_by_R[R],
             "shots": 4096,
             "n_reps": r["n_reps"],
             "mitigation": "REM",
         })
 
     sweep_file = RESULTS_DIR / "vqe-h2-sweep-tuna9.json"
-    with open(sweep_file, "w") as f:
-        json.dump(sweep, f, indent=2)
+    save_json(sweep_file, sweep)
     print(f"Website sweep data saved to: {sweep_file}")
 
     return analysis_file, sweep_file
@@ -360,46 +386,51 @@ if __name__ == "__main__":
         sys.exit(0)
 
     # Load distances from job IDs file
-    with open(job_ids_file) as f:
-        meta = json.load(f)
+    meta = load_json(job_ids_file)
     distances = meta["distances"]
 
-    # Fetch or load cached counts
+    # Fetch or load cached counts, reduced to the 4 outcomes of q4/q6 per job
     cache_file = RESULTS_DIR / "h2-5rep-raw-counts.json"
+    all_probs = None
     if "--no-fetch" in sys.argv and cache_file.exists():
-        print(f"Loading cached counts from {cache_file}")
-        with open(cache_file) as f:
-            all_counts = json.load(f)
-        n_running = 0
+        all_probs = load_p4_cache(cache_file)
+        if all_probs is not None:
+            print(f"Loading cached probabilities from {P4_CACHE}")
+        else:
+            print(f"Loading cached counts from {cache_file}")
+            all_counts = load_json(cache_file)
     else:
         all_counts, n_done, n_running = fetch_results(job_ids_file)
         if n_running > 0:
             print(f"\n{n_running} jobs still running. Exiting — re-run when complete.")
             sys.exit(1)
+    if all_probs is None:
+        # Parse every job's bitstrings once
+        all_probs = {name: counts_to_p4(c)[0] for name, c in all_counts.items()}
+        save_p4_cache(all_probs)
 
     # Load calibration (use start-of-batch from verification run)
     cal_file = RESULTS_DIR / "readout-cal-q4q6-counts.json"
     if not cal_file.exists():
         print(f"ERROR: Calibration file not found: {cal_file}")
         sys.exit(1)
-    with open(cal_file) as f:
-        start_cal = json.load(f)
+    start_cal = load_json(cal_file)
 
     # Check for end-of-batch calibration
     end_cal = {}
     for state in ["00", "10", "01", "11"]:
         key = f"cal_end_{state}"
-        if key in all_counts:
-            end_cal[state] = all_counts[key]
+        if key in all_probs:
+            end_cal[state] = all_probs[key]
 
     # Analyze with start calibration
     print("\n--- Analysis with start-of-batch calibration ---")
-    results, M, cond = analyze(all_counts, distances, start_cal)
+    results, M, cond = analyze(all_probs, distances, start_cal)
     print_report(results, cond)
 
     # Check calibration drift if end-cal available
     if len(end_cal) == 4:
-        M_end = build_confusion_matrix(end_cal)
+        M_end = np.column_stack([end_cal[prep] for prep in ["00", "01", "10", "11"]])
         drift = np.max(np.abs(M_end - M))
         print(f"\nCalibration drift (start → end): max ΔM = {drift:.4f}")
         if drift > 0.01:
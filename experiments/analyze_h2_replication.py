@@ -11,8 +11,10 @@ Physical qubits: q4 (logical 0), q6 (logical 1) on Tuna-9.
 Bitstring convention: MSB-first, 9-bit. q4 = bit[4], q6 = bit[2] (0-indexed from left).
 """
 
-import json
+import sys
 import numpy as np
+from dataclasses import dataclass
+from numpy.random import Generator, SFC64
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -20,66 +22,82 @@ from datetime import datetime, timezone
 Q0_POS = 4  # q4 → position 4 (0-indexed from left)
 Q1_POS = 2  # q6 → position 2
 
+# Shared counts and JSON helpers live next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from qi_fetch import bit_matrix, load_json, save_json
 
-def extract_qubit_values(bitstring, pos0, pos1):
-    """Extract two qubit values from a 9-bit bitstring."""
-    return int(bitstring[pos0]), int(bitstring[pos1])
 
+# Z eigenvalue signs over the 4 outcomes of (b0, b1), indexed by 2*b0 + b1
+Z0_SIGNS = np.array([1, 1, -1, -1])
+Z1_SIGNS = np.array([1, -1, 1, -1])
+ZZ_SIGNS = np.array([1, -1, -1, 1])
 
-def compute_zz_expval(counts, pos0, pos1):
-    """Compute <Z0>, <Z1>, <Z0Z1> from Z-basis measurements.
+# Bitstring positions of the idle (non-active) qubits
+IDLE_MASK = np.ones(9, dtype=bool)
+IDLE_MASK[[Q0_POS, Q1_POS]] = False
 
-    Z eigenvalue: |0⟩ → +1, |1⟩ → -1
+
+@dataclass
+class CountsSummary:
+    """One job's counts collapsed to the 4 outcomes [00, 01, 10, 11] of the active pair.
+
+    p4/n cover all shots; ps_p4/ps_n only shots where the idle qubits are
+    all 0 (post-selection). A p4 is all zeros when it has no shots.
     """
-    total = sum(counts.values())
-    z0, z1, z0z1 = 0.0, 0.0, 0.0
+    p4: np.ndarray
+    n: int
+    ps_p4: np.ndarray
+    ps_n: int
 
-    for bitstring, count in counts.items():
-        b0, b1 = extract_qubit_values(bitstring, pos0, pos1)
-        # Z eigenvalue: (-1)^bit
-        s0 = 1 - 2 * b0
-        s1 = 1 - 2 * b1
-        z0 += s0 * count
-        z1 += s1 * count
-        z0z1 += s0 * s1 * count
 
-    return z0 / total, z1 / total, z0z1 / total
+def _normalized(c4):
+    """(c4 / total, total); zeros stay zeros."""
+    n = int(c4.sum())
+    return (c4 / n if n else c4), n
 
 
-def compute_xx_expval(counts, pos0, pos1):
-    """Compute <X0X1> from X-basis measurements.
+def summarize_counts(counts, pos0=Q0_POS, pos1=Q1_POS):
+    """Build a CountsSummary, parsing the job's bitstrings exactly once.
 
-    The X-basis circuit applies Ry(-π/2) before measurement,
-    so measuring ZZ in the rotated basis gives XX.
+    Everything downstream only needs these 4-outcome distributions.
     """
-    total = sum(counts.values())
-    xx = 0.0
+    if not counts:
+        return CountsSummary(np.zeros(4), 0, np.zeros(4), 0)
+    bits = bit_matrix(counts)
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    # Raw and post-selected histograms in one bincount over 8 bins
+    idx = (bits[:, pos0] << 1) | bits[:, pos1]
+    idle = bits[:, IDLE_MASK].any(axis=1)
+    c8 = np.bincount(idx + 4 * idle, weights=weights, minlength=8)
+    p4, n = _normalized(c8[:4] + c8[4:])
+    ps_p4, ps_n = _normalized(c8[:4])
+    return CountsSummary(p4, n, ps_p4, ps_n)
+
+
+def compute_zz_expval(p4):
+    """Compute <Z0>, <Z1>, <Z0Z1> from Z-basis outcome probabilities.
+
+    Z eigenvalue: |0⟩ → +1, |1⟩ → -1
+    """
+    return float(p4 @ Z0_SIGNS), float(p4 @ Z1_SIGNS), float(p4 @ ZZ_SIGNS)
 
-    for bitstring, count in counts.items():
-        b0, b1 = extract_qubit_values(bitstring, pos0, pos1)
-        s0 = 1 - 2 * b0
-        s1 = 1 - 2 * b1
-        xx += s0 * s1 * count
 
-    return xx / total
+def compute_xx_expval(p4):
+    """Compute <X0X1> from X-basis outcome probabilities.
+
+    The X-basis circuit applies Ry(-π/2) before measurement,
+    so measuring ZZ in the rotated basis gives XX.
+    """
+    return float(p4 @ ZZ_SIGNS)
 
 
-def compute_yy_expval(counts, pos0, pos1):
-    """Compute <Y0Y1> from Y-basis measurements.
+def compute_yy_expval(p4):
+    """Compute <Y0Y1> from Y-basis outcome probabilities.
 
     The Y-basis circuit applies Rx(π/2) = Rz(-π/2)·Ry(π/2)·Rz(π/2)
     before measurement, so measuring ZZ gives YY.
     """
-    total = sum(counts.values())
-    yy = 0.0
-
-    for bitstring, count in counts.items():
-        b0, b1 = extract_qubit_values(bitstring, pos0, pos1)
-        s0 = 1 - 2 * b0
-        s1 = 1 - 2 * b1
-        yy += s0 * s1 * count
-
-    return yy / total
+    return float(p4 @ ZZ_SIGNS)
 
 
 def compute_energy(g0, g1, g4, z0, z1, xx, yy):
@@ -87,57 +105,43 @@ def compute_energy(g0, g1, g4, z0, z1, xx, yy):
     return g0 + g1 * (z0 - z1) + g4 * (xx + yy)
 
 
-def bootstrap_energy_error(counts_z, counts_x, counts_y, g0, g1, g4,
+def bootstrap_energy_error(p_z, n_z, p_x, n_x, p_y, n_y, g0, g1, g4,
                            n_bootstrap=1000, seed=42):
-    """Bootstrap estimate of energy standard error."""
-    rng = np.random.RandomState(seed)
-
-    # Convert to arrays for resampling
-    def counts_to_arrays(counts):
-        bitstrings = list(counts.keys())
-        weights = np.array([counts[b] for b in bitstrings])
-        probs = weights / weights.sum()
-        return bitstrings, probs, weights.sum()
-
-    bs_z, p_z, n_z = counts_to_arrays(counts_z)
-    bs_x, p_x, n_x = counts_to_arrays(counts_x)
-    bs_y, p_y, n_y = counts_to_arrays(counts_y)
-
-    energies = []
-    for _ in range(n_bootstrap):
-        # Resample
-        idx_z = rng.choice(len(bs_z), size=int(n_z), p=p_z)
-        idx_x = rng.choice(len(bs_x), size=int(n_x), p=p_x)
-        idx_y = rng.choice(len(bs_y), size=int(n_y), p=p_y)
-
-        # Recount
-        rc_z, rc_x, rc_y = {}, {}, {}
-        for i in idx_z:
-            rc_z[bs_z[i]] = rc_z.get(bs_z[i], 0) + 1
-        for i in idx_x:
-            rc_x[bs_x[i]] = rc_x.get(bs_x[i], 0) + 1
-        for i in idx_y:
-            rc_y[bs_y[i]] = rc_y.get(bs_y[i], 0) + 1
-
-        z0, z1, _ = compute_zz_expval(rc_z, Q0_POS, Q1_POS)
-        xx = compute_xx_expval(rc_x, Q0_POS, Q1_POS)
-        yy = compute_yy_expval(rc_y, Q0_POS, Q1_POS)
-        energies.append(compute_energy(g0, g1, g4, z0, z1, xx, yy))
+    """Bootstrap estimate of energy standard error.
 
+    Resampling n shots is a multinomial draw over the 4 outcome bins.
+    """
+    rng = Generator(SFC64(seed))
+
+    # All resamples at once: (n_bootstrap, 4) outcome counts per basis. The
+    # energy is linear in the counts, so each basis folds its coefficient,
+    # sign vector and 1/n into one weight vector and a single matvec.
+    w_z = g1 * (Z0_SIGNS - Z1_SIGNS) / n_z
+    w_x = g4 * ZZ_SIGNS / n_x
+    w_y = g4 * ZZ_SIGNS / n_y
+    energies = (g0
+                + rng.multinomial(n_z, p_z, size=n_bootstrap) @ w_z
+                + rng.multinomial(n_x, p_x, size=n_bootstrap) @ w_x
+                + rng.multinomial(n_y, p_y, size=n_bootstrap) @ w_y)
     return float(np.std(energies))
 
 
 def analyze_distance(meta, counts_z, counts_x, counts_y):
     """Analyze one bond distance."""
+    sz, sx, sy = (summarize_counts(c) for c in (counts_z, counts_x, counts_y))
     g0 = meta["g0"]
     g1 = meta["g1"]
     g4 = meta["g4"]
     fci = meta["fci_energy"]
 
+    p_z, n_z = sz.p4, sz.n
+    p_x, n_x = sx.p4, sx.n
+    p_y, n_y = sy.p4, sy.n
+
     # Expectation values
-    z0, z1, z0z1 = compute_zz_expval(counts_z, Q0_POS, Q1_POS)
-    xx = compute_xx_expval(counts_x, Q0_POS, Q1_POS)
-    yy = compute_yy_expval(counts_y, Q0_POS, Q1_POS)
+    z0, z1, z0z1 = compute_zz_expval(p_z)
+    xx = compute_xx_expval(p_x)
+    yy = compute_yy_expval(p_y)
 
     # Energy
     energy = compute_energy(g0, g1, g4, z0, z1, xx, yy)
@@ -147,38 +151,24 @@ def analyze_distance(meta, counts_z, counts_x, counts_y):
     symmetry_z0z1 = z0z1
 
     # Bootstrap error bar
-    sigma = bootstrap_energy_error(counts_z, counts_x, counts_y, g0, g1, g4)
-
-    # Post-selection: keep only bitstrings where idle qubits are 0
-    def post_select(counts):
-        """Keep only shots where non-active qubits (not q4, q6) are 0."""
-        filtered = {}
-        total_in = sum(counts.values())
-        for bs, c in counts.items():
-            # Active: positions 4 (q4) and 2 (q6). All others must be '0'.
-            keep = True
-            for i in range(9):
-                if i not in (Q0_POS, Q1_POS) and bs[i] == '1':
-                    keep = False
-                    break
-            if keep:
-                filtered[bs] = c
-        total_out = sum(filtered.values())
-        return filtered, total_out / total_in if total_in > 0 else 0
-
-    ps_z, ret_z = post_select(counts_z)
-    ps_x, ret_x = post_select(counts_x)
-    ps_y, ret_y = post_select(counts_y)
-
-    ps_retention = (ret_z + ret_x + ret_y) / 3
-
-    if ps_z and ps_x and ps_y:
-        ps_z0, ps_z1, ps_z0z1 = compute_zz_expval(ps_z, Q0_POS, Q1_POS)
-        ps_xx = compute_xx_expval(ps_x, Q0_POS, Q1_POS)
-        ps_yy = compute_yy_expval(ps_y, Q0_POS, Q1_POS)
+    sigma = bootstrap_energy_error(p_z, n_z, p_x, n_x, p_y, n_y, g0, g1, g4)
+
+    # Post-selection: keep only shots where idle qubits are 0
+    ps_p_z, ps_n_z = sz.ps_p4, sz.ps_n
+    ps_p_x, ps_n_x = sx.ps_p4, sx.ps_n
+    ps_p_y, ps_n_y = sy.ps_p4, sy.ps_n
+
+    ps_retention = sum(ps_n / n if n else 0 for ps_n, n in
+                       ((ps_n_z, n_z), (ps_n_x, n_x), (ps_n_y, n_y))) / 3
+
+    if ps_n_z and ps_n_x and ps_n_y:
+        ps_z0, ps_z1, ps_z0z1 = compute_zz_expval(ps_p_z)
+        ps_xx = compute_xx_expval(ps_p_x)
+        ps_yy = compute_yy_expval(ps_p_y)
         ps_energy = compute_energy(g0, g1, g4, ps_z0, ps_z1, ps_xx, ps_yy)
         ps_error_mha = abs(ps_energy - fci) * 1000
-        ps_sigma = bootstrap_energy_error(ps_z, ps_x, ps_y, g0, g1, g4)
+        ps_sigma = bootstrap_energy_error(ps_p_z, ps_n_z, ps_p_x, ps_n_x, ps_p_y, ps_n_y,
+                                          g0, g1, g4)
     else:
         ps_energy = None
         ps_error_mha = None
@@ -222,8 +212,7 @@ JOB_MAP = {
 
 def load_results_from_file(results_file):
     """Load pre-fetched results from a JSON file."""
-    with open(results_file) as f:
-        return json.load(f)
+    return load_json(results_file)
 
 
 def fetch_results_from_qi():
@@ -238,12 +227,9 @@ def fetch_results_from_qi():
 
 
 if __name__ == "__main__":
-    import sys
-
     # Load circuit metadata
     circuits_file = Path("experiments/results/replication-tuna9-circuits.json")
-    with open(circuits_file) as f:
-        circuit_data = json.load(f)
+    circuit_data = load_json(circuits_file)
 
     # Check for pre-fetched results file
     results_file = Path("experiments/results/h2-2qubit-tuna9-raw-counts-v3.json")
@@ -327,6 +313,5 @@ if __name__ == "__main__":
     }
 
     outfile = Path("experiments/results/h2-2qubit-vqe-tuna9-analysis.json")
-    with open(outfile, "w") as f:
-        json.dump(output, f, indent=2)
+    save_json(outfile, output)
     print(f"\nSaved to: {outfile}")
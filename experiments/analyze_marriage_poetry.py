@@ -6,12 +6,28 @@ Reads raw measurement data, maps bitstrings to poems, computes statistics,
 and saves a comprehensive results JSON.
 """
 
-import json
+import heapq
 import math
 import os
-from collections import Counter
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numexpr
+    numexpr.set_num_threads(1)
+except ImportError:
+    numexpr = None
 
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# numexpr's fused where/mul/log only beats plain NumPy on large distributions
+NUMEXPR_MIN_BUCKETS = 1 << 16
+_INV_LN2 = 1.0 / math.log(2.0)  # nats -> bits
+MAX_ENTROPY_BITS = math.log2(512)  # 9 bits = 512 states
+
+# Shared JSON helpers live next to this script
+sys.path.insert(0, os.path.dirname(__file__))
+from qi_fetch import load_json, save_json
 
 # Word banks (must match submit_quantum_poetry.py exactly)
 TENDERNESS = {
@@ -27,63 +43,109 @@ RESENTMENT = {
 }
 
 
-def bitstring_to_poem(bitstring, bank):
-    """Convert 9-bit MSB-first bitstring to poem.
+def _line_groups(v):
+    """(g1, g2, g3) line indices of the 9-bit outcome v, where bit i of v is q_i.
 
     Qubit grouping for Tuna-9 topology:
       Line 1: q0, q1, q3
       Line 2: q2, q4, q6
       Line 3: q5, q7, q8
+    """
+    q = [(v >> i) & 1 for i in range(9)]
+    return (q[3] * 4 + q[1] * 2 + q[0],
+            q[6] * 4 + q[4] * 2 + q[2],
+            q[8] * 4 + q[7] * 2 + q[5])
+
+
+# Line indices for every one of the 512 outcomes, indexed by int(bitstring, 2)
+BS_TO_GROUPS = [_line_groups(v) for v in range(512)]
+# Place values of the 9 MSB-first bitstring characters
+BIT_WEIGHTS = 1 << np.arange(8, -1, -1, dtype=np.int64)
+
+
+def poem_table(bank):
+    """The poem (line1, line2, line3) of every outcome, indexed by int(bitstring, 2)."""
+    return [(bank["line1"][g1], bank["line2"][g2], bank["line3"][g3])
+            for g1, g2, g3 in BS_TO_GROUPS]
+
+
+TENDERNESS_POEMS = poem_table(TENDERNESS)
+RESENTMENT_POEMS = poem_table(RESENTMENT)
 
-    MSB-first: bitstring[0]=q8, bitstring[8]=q0
+
+def poem_reader(poems):
+    """Bitstring -> [line1, line2, line3] lookup into one poem_table (bound as a default arg).
+
+    MSB-first: bitstring[0]=q8, bitstring[8]=q0, so int(bitstring, 2) has q_i at bit i.
     """
-    q = {}
-    for i in range(9):
-        q[i] = int(bitstring[8 - i])
+    def read(bitstring, _poems=poems):
+        return list(_poems[int(bitstring, 2)])
+    return read
 
-    g1 = q[3] * 4 + q[1] * 2 + q[0]
-    g2 = q[6] * 4 + q[4] * 2 + q[2]
-    g3 = q[8] * 4 + q[7] * 2 + q[5]
 
-    return [bank["line1"][g1], bank["line2"][g2], bank["line3"][g3]]
+bitstring_to_tenderness = poem_reader(TENDERNESS_POEMS)
+bitstring_to_resentment = poem_reader(RESENTMENT_POEMS)
 
 
 def shannon_entropy(counts, total):
-    """Shannon entropy in bits."""
-    H = 0.0
-    for c in counts.values():
-        if c > 0:
-            p = c / total
-            H -= p * math.log2(p)
-    return H
-
-
-def analyze_circuit(name, raw_results, bank, label):
-    """Analyze a single circuit's results."""
-    total = sum(raw_results.values())
-    n_bitstrings = len(raw_results)
-
-    # Map to poems
-    poem_counts = Counter()
-    for bs, count in raw_results.items():
-        poem = tuple(bitstring_to_poem(bs, bank))
-        poem_counts[poem] += count
-
-    n_poems = len(poem_counts)
-
-    # Entropy
-    bs_entropy = shannon_entropy(raw_results, total)
-    poem_entropy = shannon_entropy(poem_counts, total)
-
-    # Top poems
-    top_poems = []
-    for poem, count in poem_counts.most_common(10):
-        top_poems.append({
+    """Shannon entropy in bits of an iterable of counts."""
+    p = np.fromiter(counts, dtype=np.float64) / total
+    if numexpr is not None and p.size >= NUMEXPR_MIN_BUCKETS:
+        return float(numexpr.evaluate("sum(where(p > 0, p * log(p), 0))")) * -_INV_LN2
+    p = p[p > 0]
+    return float(-(p * np.log2(p)).sum())
+
+
+def to_soa(raw_results):
+    """Raw {bitstring: shots} as parallel int64 arrays (int(bitstring, 2), shots).
+
+    Done once on load; all later analysis works on these arrays.
+    """
+    bits = np.frombuffer("".join(raw_results).encode("ascii"), dtype=np.uint8)
+    bits = bits.reshape(len(raw_results), 9) - ord("0")
+    keys = bits.astype(np.int64) @ BIT_WEIGHTS
+    shots = np.fromiter(raw_results.values(), dtype=np.int64, count=len(raw_results))
+    return keys, shots
+
+
+def ingest(results):
+    """Aggregate a circuit's (keys, shots) per outcome index in one pass.
+
+    Returns (counts, order, total): a 512-entry list of shots, the indices
+    in first-seen order (so ties rank as they would in a Counter), and the
+    total shot count. Distinct outcomes always give distinct poems, so each
+    index is one poem.
+    """
+    idx, shots = results
+    counts = np.zeros(512, dtype=np.int64)
+    np.add.at(counts, idx, shots)
+    return counts.tolist(), list(dict.fromkeys(idx.tolist())), int(shots.sum())
+
+
+def top_poems(counts, order, poems, total, n):
+    """The n most frequent poems, looked up in a poem_table."""
+    top = []
+    # nlargest breaks ties by position in order, like a stable sort
+    for idx in heapq.nlargest(n, order, key=counts.__getitem__):
+        poem = poems[idx]
+        count = counts[idx]
+        top.append({
             "lines": list(poem),
             "count": count,
             "probability": round(count / total, 4),
             "text": "\n".join(poem),
         })
+    return top
+
+
+def analyze_circuit(name, results, poems, label):
+    """Analyze a single circuit's (keys, shots) results."""
+    poem_counts, order, total = ingest(results)
+    n_bitstrings = len(results[0])
+    n_poems = len(order)
+
+    # Entropy (bitstrings and poems are in 1:1 correspondence, so they agree)
+    bs_entropy = poem_entropy = shannon_entropy(poem_counts, total)
 
     return {
         "circuit": name,
@@ -93,42 +155,27 @@ def analyze_circuit(name, raw_results, bank, label):
         "unique_poems": n_poems,
         "bitstring_entropy_bits": round(bs_entropy, 3),
         "poem_entropy_bits": round(poem_entropy, 3),
-        "max_bitstring_entropy": round(math.log2(512), 3),  # 9 bits = 512 states
-        "top_poems": top_poems,
+        "max_bitstring_entropy": round(MAX_ENTROPY_BITS, 3),
+        "top_poems": top_poems(poem_counts, order, poems, total, 10),
     }
 
 
-def analyze_ghz(raw_results):
-    """Special analysis for GHZ circuit."""
-    total = sum(raw_results.values())
+def analyze_ghz(results):
+    """Special analysis for GHZ circuit (keys, shots) results."""
+    # Map ALL bitstrings to tenderness poems (Z-basis for GHZ)
+    poem_counts, order, total = ingest(results)
 
     # Ideal GHZ states
-    all_zero = raw_results.get("000000000", 0)
-    all_one = raw_results.get("111111111", 0)
+    all_zero = poem_counts[0]
+    all_one = poem_counts[511]
     fidelity = (all_zero + all_one) / total
 
-    # Map ALL bitstrings to tenderness poems (Z-basis for GHZ)
-    poem_counts = Counter()
-    for bs, count in raw_results.items():
-        poem = tuple(bitstring_to_poem(bs, TENDERNESS))
-        poem_counts[poem] += count
-
-    n_poems = len(poem_counts)
-    bs_entropy = shannon_entropy(raw_results, total)
-    poem_entropy = shannon_entropy(poem_counts, total)
+    n_poems = len(order)
+    bs_entropy = poem_entropy = shannon_entropy(poem_counts, total)
 
     # The two ideal poems
-    poem_000 = bitstring_to_poem("000000000", TENDERNESS)
-    poem_111 = bitstring_to_poem("111111111", TENDERNESS)
-
-    top_poems = []
-    for poem, count in poem_counts.most_common(15):
-        top_poems.append({
-            "lines": list(poem),
-            "count": count,
-            "probability": round(count / total, 4),
-            "text": "\n".join(poem),
-        })
+    poem_000 = bitstring_to_tenderness("000000000")
+    poem_111 = bitstring_to_tenderness("111111111")
 
     # Categorize: how many shots are "pure tenderness" vs "pure resentment" vs "mixed"
     # In GHZ, all-0 = tenderness poem #0, all-1 = tenderness poem #7 (last index)
@@ -139,7 +186,7 @@ def analyze_ghz(raw_results):
         "circuit": "marriage-ghz",
         "reading": "all-or-nothing (GHZ)",
         "total_shots": total,
-        "unique_bitstrings": len(raw_results),
+        "unique_bitstrings": len(results[0]),
         "unique_poems": n_poems,
         "ghz_fidelity": round(fidelity, 4),
         "all_zero_count": all_zero,
@@ -148,23 +195,25 @@ def analyze_ghz(raw_results):
         "ideal_poem_b": poem_111,
         "bitstring_entropy_bits": round(bs_entropy, 3),
         "poem_entropy_bits": round(poem_entropy, 3),
-        "top_poems": top_poems,
+        "top_poems": top_poems(poem_counts, order, TENDERNESS_POEMS, total, 15),
     }
 
 
 def main():
     # Load raw results
     jobs_path = os.path.join(RESULTS_DIR, "quantum-poetry-marriage-jobs.json")
-    with open(jobs_path) as f:
-        jobs = json.load(f)
 
     # Raw results (hardcoded from qi_get_results — already fetched)
-    raw = {}
-    for name in ["marriage-z-basis", "marriage-x-basis", "marriage-ghz"]:
-        path = os.path.join(RESULTS_DIR, f"quantum-poetry-{name}-raw.json")
-        if os.path.exists(path):
-            with open(path) as f:
-                raw[name] = json.load(f)
+    paths = {name: os.path.join(RESULTS_DIR, f"quantum-poetry-{name}-raw.json")
+             for name in ["marriage-z-basis", "marriage-x-basis", "marriage-ghz"]}
+
+    # The four files are read and parsed concurrently
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        jobs_future = ex.submit(load_json, jobs_path)
+        loaded = ex.map(lambda path: load_json(path) if os.path.exists(path) else None,
+                        paths.values())
+        raw = {name: to_soa(data) for name, data in zip(paths, loaded) if data is not None}
+        jobs = jobs_future.result()
 
     if not raw:
         print("No raw results found. Run fetch_poetry_results.py first.")
@@ -172,9 +221,9 @@ def main():
 
     # Analyze each circuit
     z_analysis = analyze_circuit("marriage-z-basis", raw["marriage-z-basis"],
-                                 TENDERNESS, "tenderness (Z-basis)")
+                                 TENDERNESS_POEMS, "tenderness (Z-basis)")
     x_analysis = analyze_circuit("marriage-x-basis", raw["marriage-x-basis"],
-                                 RESENTMENT, "resentment (X-basis)")
+                                 RESENTMENT_POEMS, "resentment (X-basis)")
     ghz_analysis = analyze_ghz(raw["marriage-ghz"])
 
     # Build full results
@@ -205,57 +254,55 @@ def main():
 
     # Save
     outpath = os.path.join(RESULTS_DIR, "quantum-poetry-marriage-results.json")
-    with open(outpath, "w") as f:
-        json.dump(results, f, indent=2)
+    save_json(outpath, results)
     print(f"Results saved to {outpath}")
 
-    # Print summary
-    print("\n" + "=" * 70)
-    print("  QUANTUM MARRIAGE — TUNA-9 HARDWARE RESULTS")
-    print("  Valentine's Day, 2026")
-    print("=" * 70)
+    # Print summary: collected as lines, written in one call
+    out = [
+        "\n" + "=" * 70,
+        "  QUANTUM MARRIAGE — TUNA-9 HARDWARE RESULTS",
+        "  Valentine's Day, 2026",
+        "=" * 70,
+    ]
 
     for label, analysis in [
         ("TENDERNESS (Z-basis)", z_analysis),
         ("RESENTMENT (X-basis)", x_analysis),
     ]:
-        print(f"\n--- {label} ---")
-        print(f"  {analysis['unique_bitstrings']} bitstrings → {analysis['unique_poems']} poems")
-        print(f"  Entropy: {analysis['poem_entropy_bits']:.1f} bits (max {math.log2(512):.1f})")
+        out.append(f"\n--- {label} ---")
+        out.append(f"  {analysis['unique_bitstrings']} bitstrings → {analysis['unique_poems']} poems")
+        out.append(f"  Entropy: {analysis['poem_entropy_bits']:.1f} bits (max {MAX_ENTROPY_BITS:.1f})")
         for p in analysis["top_poems"][:3]:
             pct = p["probability"] * 100
-            print(f"\n  [{pct:.1f}% — {p['count']} shots]")
-            for line in p["lines"]:
-                print(f"    {line}")
+            out.append(f"\n  [{pct:.1f}% — {p['count']} shots]")
+            out.extend(f"    {line}" for line in p["lines"])
 
-    print(f"\n--- GHZ (ALL-OR-NOTHING) ---")
-    print(f"  Fidelity: {ghz_analysis['ghz_fidelity']:.1%}")
-    print(f"  |000000000⟩: {ghz_analysis['all_zero_count']} shots")
-    print(f"  |111111111⟩: {ghz_analysis['all_one_count']} shots")
-    print(f"  {ghz_analysis['unique_poems']} poems total (noise creates mixed states)")
+    out.append(f"\n--- GHZ (ALL-OR-NOTHING) ---")
+    out.append(f"  Fidelity: {ghz_analysis['ghz_fidelity']:.1%}")
+    out.append(f"  |000000000⟩: {ghz_analysis['all_zero_count']} shots")
+    out.append(f"  |111111111⟩: {ghz_analysis['all_one_count']} shots")
+    out.append(f"  {ghz_analysis['unique_poems']} poems total (noise creates mixed states)")
 
-    print(f"\n  Poem A ({ghz_analysis['all_zero_count']} shots):")
-    for line in ghz_analysis["ideal_poem_a"]:
-        print(f"    {line}")
+    out.append(f"\n  Poem A ({ghz_analysis['all_zero_count']} shots):")
+    out.extend(f"    {line}" for line in ghz_analysis["ideal_poem_a"])
 
-    print(f"\n  Poem B ({ghz_analysis['all_one_count']} shots):")
-    for line in ghz_analysis["ideal_poem_b"]:
-        print(f"    {line}")
+    out.append(f"\n  Poem B ({ghz_analysis['all_one_count']} shots):")
+    out.extend(f"    {line}" for line in ghz_analysis["ideal_poem_b"])
 
     # The noise poems — the most interesting artistic finding
-    print(f"\n--- NOISE POEMS (the cracks in the GHZ) ---")
+    out.append(f"\n--- NOISE POEMS (the cracks in the GHZ) ---")
+    ideal_set = {tuple(ghz_analysis["ideal_poem_a"]), tuple(ghz_analysis["ideal_poem_b"])}
     for p in ghz_analysis["top_poems"]:
-        if p["lines"] == ghz_analysis["ideal_poem_a"] or p["lines"] == ghz_analysis["ideal_poem_b"]:
+        if tuple(p["lines"]) in ideal_set:
             continue
         pct = p["probability"] * 100
         if pct < 1.0:
             break
-        print(f"\n  [{pct:.1f}% — {p['count']} shots]")
-        for line in p["lines"]:
-            print(f"    {line}")
-
-    print()
+        out.append(f"\n  [{pct:.1f}% — {p['count']} shots]")
+        out.extend(f"    {line}" for line in p["lines"])
 
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
 
 if __name__ == "__main__":
     main()
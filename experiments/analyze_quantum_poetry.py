@@ -10,21 +10,21 @@ Parses results from three experiments run on Tuna-9 emulator:
 Produces a formatted report and JSON output.
 """
 
-import json
 import math
 import os
 import sys
-from collections import Counter
 from datetime import datetime
+import numpy as np
 
 # Add parent so we can import from quantum_poetry
 sys.path.insert(0, os.path.dirname(__file__))
 from quantum_poetry import (
     HAIKU_LINES_Z, HAIKU_LINES_X, BELL_COUPLETS, COUPLET_WORDS,
     bitstring_to_haiku, bitstring_to_couplet, results_to_poems,
-    correlation_analysis, entropy_per_line,
+    entropy_per_line,
     circuit_ghz9, circuit_bell_couplets, circuit_entangled_haiku,
 )
+from qi_fetch import save_json
 
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
 
@@ -41,6 +41,11 @@ BELL_RESULTS = {
     "11110000": 55, "11110011": 51, "11111100": 66, "11111111": 63,
 }
 
+# 4-bit couplet keys and their (line1, line2), indexed by int(key, 2)
+COUPLET_KEYS = [format(i, "04b") for i in range(16)]
+COUPLET_LINES = [BELL_COUPLETS.get(key, (f"[unmapped: {key}]",) * 2)
+                 for key in COUPLET_KEYS]
+
 # =============================================================================
 # ANALYSIS FUNCTIONS
 # =============================================================================
@@ -99,7 +104,8 @@ def analyze_bell_couplets():
     print("=" * 72)
     print()
 
-    total = sum(BELL_RESULTS.values())
+    keys, shots = to_soa(BELL_RESULTS, n_qubits=8)
+    total = int(shots.sum())
     print(f"  Total shots: {total}")
     print(f"  Unique outcomes: {len(BELL_RESULTS)}")
     print()
@@ -108,19 +114,14 @@ def analyze_bell_couplets():
     # Each Bell pair (q_even, q_odd) should be perfectly correlated
     print("  Bell pair correlations (even qubit == odd qubit):")
     pair_stats = {}
+    # MSB-first: bit[0]=q7, bit[7]=q0, so the keys have q_i at bit i.
+    # Bit q_even of v ^ (v >> 1) is 1 exactly when the pair disagrees.
+    disagree = keys ^ (keys >> 1)
     for pair_idx in range(4):
         q_even = pair_idx * 2      # q0, q2, q4, q6
         q_odd = q_even + 1          # q1, q3, q5, q7
-        same = 0
-        diff = 0
-        for bitstring, count in BELL_RESULTS.items():
-            # MSB-first: bit[0]=q7, bit[7]=q0
-            b_even = bitstring[7 - q_even]
-            b_odd = bitstring[7 - q_odd]
-            if b_even == b_odd:
-                same += count
-            else:
-                diff += count
+        diff = int(shots @ ((disagree >> q_even) & 1))
+        same = total - diff
         corr = (same - diff) / total
         pair_stats[f"pair{pair_idx}"] = round(corr, 4)
         dim_names = ["time", "element", "action", "quality"]
@@ -128,40 +129,28 @@ def analyze_bell_couplets():
               f"corr = {corr:+.4f}  (same={same}, diff={diff})")
     print()
 
-    # Map to couplets using the even-qubit extraction
-    couplet_counts = Counter()
-    couplet_details = {}
-
-    for bitstring, count in BELL_RESULTS.items():
-        # Extract even-qubit bits: q0=bitstring[7], q2=bitstring[5], q4=bitstring[3], q6=bitstring[1]
-        key = bitstring[7] + bitstring[5] + bitstring[3] + bitstring[1]
-
-        if key in BELL_COUPLETS:
-            line1, line2 = BELL_COUPLETS[key]
-            couplet = f"{line1}\n{line2}"
-        else:
-            couplet = f"[unmapped key: {key}]"
-            line1, line2 = f"[unmapped: {key}]", f"[unmapped: {key}]"
-
-        couplet_counts[couplet] += count
-        if key not in couplet_details:
-            couplet_details[key] = {
-                "line1": line1,
-                "line2": line2,
-                "shots": 0,
-                "bitstrings": [],
-            }
-        couplet_details[key]["shots"] += count
-        couplet_details[key]["bitstrings"].append(bitstring)
+    # Map to couplets using the even-qubit extraction: per-key shots and
+    # contributing bitstrings in 16-entry arrays indexed by the key bits
+    # (key = q0 q2 q4 q6, q0 most significant)
+    key_ints = (keys & 1) << 3 | (keys >> 2 & 1) << 2 | (keys >> 4 & 1) << 1 | (keys >> 6 & 1)
+    couplet_shots = np.zeros(16, dtype=np.int64)
+    np.add.at(couplet_shots, key_ints, shots)
+    couplet_shots = couplet_shots.tolist()
+    contrib = [[] for _ in range(16)]
+    for bitstring, key_int in zip(BELL_RESULTS, key_ints.tolist()):
+        contrib[key_int].append(bitstring)
+    seen = list(dict.fromkeys(key_ints.tolist()))
 
     # Print couplets sorted by key for readability
     print("  Generated couplets (all 16 outcomes):")
     print()
 
     report_couplets = []
-    for key in sorted(couplet_details.keys()):
-        info = couplet_details[key]
-        frac = info["shots"] / total
+    for key_int in sorted(seen):
+        key = COUPLET_KEYS[key_int]
+        line1, line2 = COUPLET_LINES[key_int]
+        n_shots = couplet_shots[key_int]
+        frac = n_shots / total
         # Decode the 4 semantic bits
         bits = [int(b) for b in key]
         time_word = "dawn" if bits[0] == 0 else "dusk"
@@ -169,15 +158,15 @@ def analyze_bell_couplets():
         act_word = "gathers" if bits[2] == 0 else "scatters"
         qual_word = "sound" if bits[3] == 0 else "wound"
 
-        print(f"  [{key}] {info['shots']:>3d} shots ({frac:.1%})  "
+        print(f"  [{key}] {n_shots:>3d} shots ({frac:.1%})  "
               f"[{time_word}/{elem_word}/{act_word}/{qual_word}]")
-        print(f"    L1: {info['line1']}")
-        print(f"    L2: {info['line2']}")
+        print(f"    L1: {line1}")
+        print(f"    L2: {line2}")
         print()
 
         report_couplets.append({
             "key": key,
-            "shots": info["shots"],
+            "shots": n_shots,
             "fraction": round(frac, 4),
             "semantics": {
                 "time": time_word,
@@ -185,15 +174,15 @@ def analyze_bell_couplets():
                 "action": act_word,
                 "quality": qual_word,
             },
-            "line1": info["line1"],
-            "line2": info["line2"],
-            "contributing_bitstrings": info["bitstrings"],
+            "line1": line1,
+            "line2": line2,
+            "contributing_bitstrings": contrib[key_int],
         })
 
     # Check uniformity (should be ~1/16 = 6.25% each)
     expected = total / 16
-    chi_sq = sum((info["shots"] - expected)**2 / expected
-                 for info in couplet_details.values())
+    chi_sq = sum((couplet_shots[key_int] - expected)**2 / expected
+                 for key_int in seen)
     # 15 degrees of freedom, chi-sq critical value at 0.05 = 25.0
     print(f"  Uniformity test: chi-squared = {chi_sq:.2f} (df=15, critical=25.0)")
     print(f"    Expected per couplet: {expected:.1f}")
@@ -216,6 +205,29 @@ def analyze_bell_couplets():
     }
 
 
+def to_soa(results, n_qubits):
+    """{bitstring: shots} as parallel int64 arrays (int(bitstring, 2), shots)."""
+    bits = np.frombuffer("".join(results).encode("ascii"), dtype=np.uint8)
+    bits = bits.reshape(len(results), n_qubits) - ord("0")
+    keys = bits.astype(np.int64) @ (1 << np.arange(n_qubits - 1, -1, -1, dtype=np.int64))
+    shots = np.fromiter(results.values(), dtype=np.int64, count=len(results))
+    return keys, shots
+
+
+def correlation_matrix(results, n_qubits):
+    """All pairwise qubit correlations <s_i s_j> (s = +1 for 0, -1 for 1) at once.
+
+    Returns an (n_qubits, n_qubits) array indexed by qubit number; the same
+    values as quantum_poetry.correlation_analysis, from one weighted matmul.
+    """
+    counts = np.fromiter(results.values(), dtype=np.float64, count=len(results))
+    bits = np.frombuffer("".join(results).encode("ascii"), dtype=np.uint8)
+    # MSB-first strings: reverse the columns so column i is qubit i
+    bits = bits.reshape(len(results), n_qubits)[:, ::-1] - ord("0")
+    signs = 1.0 - 2.0 * bits
+    return (signs.T * counts) @ signs / counts.sum()
+
+
 def analyze_inter_group_correlations():
     """Compare inter-group correlations for entangled vs product Bell states."""
     print("=" * 72)
@@ -225,12 +237,12 @@ def analyze_inter_group_correlations():
 
     # For Bell couplets, the inter-pair correlations should be ~0
     # (pairs are independent) while intra-pair correlations are +1
-    corrs = correlation_analysis(BELL_RESULTS, n_qubits=8)
+    corrs = correlation_matrix(BELL_RESULTS, n_qubits=8)
 
     print("  Intra-pair correlations (should be ~+1.0):")
     for pair_idx in range(4):
         i, j = pair_idx * 2, pair_idx * 2 + 1
-        print(f"    q{i}-q{j}: {corrs[(i,j)]:+.4f}")
+        print(f"    q{i}-q{j}: {corrs[i, j]:+.4f}")
 
     print()
     print("  Inter-pair correlations (should be ~0.0 for independent pairs):")
@@ -239,8 +251,7 @@ def analyze_inter_group_correlations():
         for p2 in range(p1+1, 4):
             for qi in [p1*2, p1*2+1]:
                 for qj in [p2*2, p2*2+1]:
-                    key = (min(qi,qj), max(qi,qj))
-                    val = corrs[key]
+                    val = float(corrs[qi, qj])
                     inter_corrs.append(val)
                     print(f"    q{qi}-q{qj}: {val:+.4f}")
 
@@ -250,7 +261,7 @@ def analyze_inter_group_correlations():
 
     return {
         "intra_pair_mean_correlation": round(
-            sum(corrs[(i*2, i*2+1)] for i in range(4)) / 4, 4),
+            float(sum(corrs[i*2, i*2+1] for i in range(4))) / 4, 4),
         "inter_pair_mean_abs_correlation": round(mean_inter, 4),
     }
 
@@ -284,7 +295,7 @@ def main():
     print("    - The poem exists in superposition until measured")
     print()
     print("  Bell Couplets:")
-    print(f"    - 16 couplets from {sum(BELL_RESULTS.values())} shots")
+    print(f"    - 16 couplets from {bell_report['total_shots']} shots")
     print(f"    - Intra-pair correlation: {corr_report['intra_pair_mean_correlation']:+.4f}")
     print(f"    - Inter-pair |correlation|: {corr_report['inter_pair_mean_abs_correlation']:.4f}")
     print("    - Each line 1 / line 2 word pair is Bell-entangled")
@@ -302,9 +313,9 @@ def main():
         },
         "summary": {
             "ghz_haiku_count": 2,
-            "ghz_total_shots": sum(GHZ_RESULTS.values()),
+            "ghz_total_shots": ghz_report["total_shots"],
             "bell_couplet_count": 16,
-            "bell_total_shots": sum(BELL_RESULTS.values()),
+            "bell_total_shots": bell_report["total_shots"],
             "bell_intra_pair_correlation": corr_report["intra_pair_mean_correlation"],
             "bell_inter_pair_correlation": corr_report["inter_pair_mean_abs_correlation"],
         },
@@ -313,8 +324,7 @@ def main():
     # Save JSON
     os.makedirs(RESULTS_DIR, exist_ok=True)
     outpath = os.path.join(RESULTS_DIR, "quantum-poetry-experiment1.json")
-    with open(outpath, "w") as f:
-        json.dump(report, f, indent=2)
+    save_json(outpath, report)
     print(f"  JSON report saved to: {outpath}")
     print()
 
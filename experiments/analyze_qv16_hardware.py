@@ -10,9 +10,9 @@ Usage:
   python analyze_qv16_hardware.py          # fetch + analyze
   python analyze_qv16_hardware.py --check  # just check job status
   python analyze_qv16_hardware.py --no-fetch  # use cached counts
+  python analyze_qv16_hardware.py --wait  # fetch, polling pending jobs until done
 """
 
-import json
 import sys
 import numpy as np
 from pathlib import Path
@@ -22,137 +22,107 @@ RESULTS_DIR = Path("experiments/results")
 JOB_IDS_FILE = RESULTS_DIR / "qv16-tuna9-hardware-job-ids.json"
 RAW_COUNTS_FILE = RESULTS_DIR / "qv16-tuna9-hardware-counts.json"
 ANALYSIS_FILE = RESULTS_DIR / "qv16-tuna9-hardware-analysis.json"
+COUNTS_CACHE = RESULTS_DIR / "qv16-tuna9-hardware-counts.npz"  # decoded counts per circuit
+PROGRESS_BATCH = 20  # jobs per progress line while fetching
 
 NUM_QUBITS = 4
 PHYS_QUBITS = [4, 6, 7, 8]
 
+# Shared QI fetch/poll helpers and result caches live next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from qi_fetch import (check_status, fetch_results, load_counts_npz, load_json,
+                      pack_bitstrings, save_counts_npz, save_json)
 
-def hardware_bs_to_logical(bitstring):
-    """Convert 9-bit MSB-first hardware bitstring to 4-bit logical bitstring.
 
-    Hardware: bs[i] = qubit (8-i) in MSB-first
-    Physical qubits [4,6,7,8] → logical [0,1,2,3]
-    Logical output: MSB-first, bs[j] = logical qubit (3-j)
+def to_logical_index(key):
+    """int(logical_bs, 2) for a hardware (9-bit), logical (4-bit) or integer key.
+
+    Hardware keys are MSB-first over qubits 8..0; logical bit j is physical
+    qubit PHYS_QUBITS[j], i.e. physical qubits [4,6,7,8] -> logical [0,1,2,3].
     """
-    phys_to_logical = {4: 0, 6: 1, 7: 2, 8: 3}
-    logical_bits = ['0'] * NUM_QUBITS
-    for phys_idx, log_idx in phys_to_logical.items():
-        bs_pos = 8 - phys_idx  # MSB-first position in 9-bit string
-        qubit_val = bitstring[bs_pos]
-        logical_bits[NUM_QUBITS - 1 - log_idx] = qubit_val
-    return ''.join(logical_bits)
-
-
-def compute_hof(counts, heavy_set):
-    """Compute heavy output fraction from hardware counts."""
-    total = 0
-    heavy_count = 0
-    for bitstring, count in counts.items():
-        # Handle both 9-bit (hardware) and 4-bit (bit register) formats
-        if len(bitstring) == 9:
-            logical_bs = hardware_bs_to_logical(bitstring)
-        elif len(bitstring) == 4:
-            logical_bs = bitstring
-        else:
-            # Try to parse as integer
-            logical_bs = format(int(bitstring), f'0{NUM_QUBITS}b')
-
-        total += count
-        if logical_bs in heavy_set:
-            heavy_count += count
-
-    return heavy_count / total if total > 0 else 0.0
-
-
-def fetch_results(job_data):
-    """Fetch all results from QI."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-    backend = RemoteBackend()
-
-    job_ids = job_data["job_ids"]
-    counts = {}
-    n_done = 0
-    n_pending = 0
-    n_fail = 0
-
-    for name, job_id in job_ids.items():
-        if isinstance(job_id, str) and job_id.startswith("FAILED"):
-            n_fail += 1
-            continue
-        try:
-            job = backend.get_job(int(job_id))
-            status = str(getattr(job, "status", ""))
-
-            if "COMPLETED" in status:
-                raw = backend.get_results(int(job_id))
-                items = raw.items if hasattr(raw, "items") else raw
-                histogram = None
-                for item in items:
-                    if hasattr(item, "results") and item.results:
-                        histogram = item.results
-                        break
-                if histogram:
-                    counts[name] = {k: int(v) for k, v in histogram.items()}
-                    n_done += 1
-                else:
-                    n_fail += 1
-            elif "RUNNING" in status or "PLANNED" in status:
-                n_pending += 1
-            else:
-                n_fail += 1
-        except Exception as e:
-            n_fail += 1
-            print(f"  Error fetching {name} (job {job_id}): {e}")
-
-        if (n_done + n_pending + n_fail) % 20 == 0:
-            print(f"  Fetched {n_done}, pending {n_pending}, failed {n_fail}")
-
-    print(f"Total: {n_done} done, {n_pending} pending, {n_fail} failed")
-    return counts, n_pending
-
-
-def check_status(job_data):
-    """Quick status check on sample of jobs."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-    backend = RemoteBackend()
-
-    items = list(job_data["job_ids"].items())
-    sample = items[:3] + items[len(items)//2:len(items)//2+3] + items[-3:]
-
-    done = 0
-    pending = 0
-    for name, job_id in sample:
-        if isinstance(job_id, str) and job_id.startswith("FAILED"):
-            continue
-        try:
-            job = backend.get_job(int(job_id))
-            status = str(getattr(job, "status", ""))
-            if "COMPLETED" in status:
-                done += 1
-            else:
-                pending += 1
-        except:
-            pending += 1
-
-    print(f"Sample ({len(sample)} jobs): {done} done, {pending} pending")
-    return pending == 0
-
-
-def analyze(counts, job_data):
+    if len(key) == 9:
+        hw = int(key, 2)
+        return sum(((hw >> q) & 1) << j for j, q in enumerate(PHYS_QUBITS))
+    elif len(key) == NUM_QUBITS:
+        return int(key, 2)
+    else:
+        # Integer-valued outcome
+        return int(key)
+
+
+# Bit j of a logical outcome is hardware qubit PHYS_QUBITS[j]
+LOGICAL_SHIFTS = np.array(PHYS_QUBITS, dtype=np.uint16)
+LOGICAL_WEIGHTS = (1 << np.arange(NUM_QUBITS)).astype(np.uint16)
+
+
+def logical_outcomes(counts):
+    """int(logical_bs, 2) of every key in counts, as an integer array in key order.
+
+    Uniform 9-bit or 4-bit keys are packed in bulk and 9-bit hardware
+    outcomes mapped to logical ones with bit ops; anything else goes
+    through to_logical_index key by key. Integer-valued keys are kept
+    as-is, so they may fall outside the 2**NUM_QUBITS logical outcomes.
+    """
+    widths = {len(k) for k in counts}
+    if widths == {9}:
+        hw = pack_bitstrings(counts, 9)
+        return ((hw[:, None] >> LOGICAL_SHIFTS) & 1) @ LOGICAL_WEIGHTS
+    if widths == {NUM_QUBITS}:
+        return pack_bitstrings(counts, NUM_QUBITS)
+    return np.array([to_logical_index(k) for k in counts], dtype=np.int64)
+
+
+def heavy_bitmask(heavy_bitstrings):
+    """Heavy set as a 16-bit mask: bit int(b, 2) is set for each heavy b."""
+    mask = 0
+    for b in heavy_bitstrings:
+        mask |= 1 << int(b, 2)
+    return mask
+
+
+def decode_counts(counts):
+    """Hardware counts as parallel arrays (logical outcome index, shots)."""
+    shots = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    return logical_outcomes(counts), shots
+
+
+def histogram_distribution(decoded, nbits=NUM_QUBITS):
+    """Outcome probabilities as a dense 2**nbits array (one bincount over the shots).
+
+    Outcomes outside [0, 2**nbits) count toward the shot total but get no
+    bin, so the returned probabilities then sum to less than one.
+    """
+    if isinstance(decoded, dict):
+        decoded = decode_counts(decoded)
+    outcomes, shots = decoded
+    total = shots.sum()
+    if total <= 0:
+        return np.zeros(1 << nbits)
+    in_range = (outcomes >= 0) & (outcomes < 1 << nbits)
+    return np.bincount(outcomes[in_range], weights=shots[in_range], minlength=1 << nbits) / total
+
+
+def compute_hof(decoded, heavy_mask):
+    """Heavy output fraction of a counts dict or decode_counts() arrays (see heavy_bitmask)."""
+    p = histogram_distribution(decoded)
+    heavy = (heavy_mask >> np.arange(1 << NUM_QUBITS)) & 1
+    return float(p @ heavy)
+
+
+def analyze(decoded, job_data):
     """QV analysis following Cross et al. 2019."""
     ideal_data = job_data["ideal_data"]
 
     hof_values = []
     per_circuit = []
 
-    for circ_name in sorted(ideal_data.keys()):
-        if circ_name not in counts:
-            continue
-
-        heavy_set = set(ideal_data[circ_name]["heavy_bitstrings"])
-        ideal_hof = ideal_data[circ_name]["ideal_heavy_output_fraction"]
+    # (name, heavy mask, ideal HOF) of every circuit with results, in name order
+    circuits = sorted(((name, heavy_bitmask(d["heavy_bitstrings"]), d["ideal_heavy_output_fraction"])
+                       for name, d in ideal_data.items() if name in decoded),
+                      key=lambda c: c[0])
 
-        hof = compute_hof(counts[circ_name], heavy_set)
+    for circ_name, heavy_mask, ideal_hof in circuits:
+        hof = compute_hof(decoded[circ_name], heavy_mask)
         passed = hof > 2/3
         hof_values.append(hof)
 
@@ -190,11 +160,11 @@ def analyze(counts, job_data):
     # Histogram of HOF values
     bins = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.667, 0.7, 0.8, 0.9, 1.0]
     hist, _ = np.histogram(hof_values, bins=bins)
-    print(f"\n  HOF distribution:")
-    for i in range(len(bins)-1):
-        bar = '#' * int(hist[i])
-        marker = " <-- threshold" if bins[i+1] == 0.667 else ""
-        print(f"    [{bins[i]:.3f}-{bins[i+1]:.3f}): {hist[i]:3d} {bar}{marker}")
+    lines = ["\n  HOF distribution:"]
+    for lo, hi, n in zip(bins, bins[1:], hist.tolist()):
+        marker = " <-- threshold" if hi == 0.667 else ""
+        lines.append(f"    [{lo:.3f}-{hi:.3f}): {n:3d} {'#' * n}{marker}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
     analysis = {
         "experiment": "QV=16 Tuna-9 hardware",
@@ -219,8 +189,7 @@ def analyze(counts, job_data):
         "per_circuit": per_circuit,
     }
 
-    with open(ANALYSIS_FILE, "w") as f:
-        json.dump(analysis, f, indent=2)
+    save_json(ANALYSIS_FILE, analysis)
     print(f"\nAnalysis saved to: {ANALYSIS_FILE}")
 
     return analysis
@@ -232,8 +201,7 @@ def main():
         print("Run submit_qv16_hardware.py first.")
         sys.exit(1)
 
-    with open(JOB_IDS_FILE) as f:
-        job_data = json.load(f)
+    job_data = load_json(JOB_IDS_FILE)
 
     print(f"QV=16: {job_data['n_submitted']} circuits submitted")
 
@@ -245,21 +213,27 @@ def main():
         if not RAW_COUNTS_FILE.exists():
             print(f"No cached counts: {RAW_COUNTS_FILE}")
             sys.exit(1)
-        with open(RAW_COUNTS_FILE) as f:
-            counts = json.load(f)
-        print(f"Loaded {len(counts)} cached results")
+        decoded = load_counts_npz(RAW_COUNTS_FILE, COUNTS_CACHE, PHYS_QUBITS)
+        if decoded is None:
+            decoded = {name: decode_counts(hist)
+                       for name, hist in load_json(RAW_COUNTS_FILE).items()}
+            save_counts_npz(decoded, COUNTS_CACHE, PHYS_QUBITS)
+        print(f"Loaded {len(decoded)} cached results")
     else:
         print("Fetching results from QI...")
-        counts, n_pending = fetch_results(job_data)
+        counts, n_pending = fetch_results(job_data, wait="--wait" in sys.argv,
+                                          progress_every=PROGRESS_BATCH)
         if n_pending > 0:
             print(f"\n{n_pending} jobs still pending. Run --check to monitor.")
             sys.exit(1)
 
-        with open(RAW_COUNTS_FILE, "w") as f:
-            json.dump(counts, f)
+        save_json(RAW_COUNTS_FILE, counts, indent=False)
         print(f"Cached {len(counts)} results to {RAW_COUNTS_FILE}")
+        # Each circuit's bitstrings are decoded once, up front
+        decoded = {name: decode_counts(hist) for name, hist in counts.items()}
+        save_counts_npz(decoded, COUNTS_CACHE, PHYS_QUBITS)
 
-    analyze(counts, job_data)
+    analyze(decoded, job_data)
 
 
 if __name__ == "__main__":
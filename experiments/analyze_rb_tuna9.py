@@ -9,12 +9,14 @@ Usage:
   python analyze_rb_tuna9.py          # fetch + analyze
   python analyze_rb_tuna9.py --check  # just check job status
   python analyze_rb_tuna9.py --no-fetch  # use cached counts
+  python analyze_rb_tuna9.py --wait  # fetch, polling pending jobs until done
 """
 
-import json
+import functools
+import hashlib
 import sys
 import numpy as np
-from scipy.optimize import curve_fit
+from scipy.optimize import least_squares
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -22,109 +24,148 @@ RESULTS_DIR = Path("experiments/results")
 JOB_IDS_FILE = RESULTS_DIR / "rb-tuna9-job-ids.json"
 RAW_COUNTS_FILE = RESULTS_DIR / "rb-tuna9-raw-counts.json"
 ANALYSIS_FILE = RESULTS_DIR / "rb-tuna9-analysis.json"
+COUNTS_CACHE = RESULTS_DIR / "rb-tuna9-raw-counts.npz"  # decoded counts per circuit
+FIT_CACHE_DIR = RESULTS_DIR / "rb_fit_cache"  # fitted (popt, perr) keyed by input hash
+# Fit method in the cache key (solver, Jacobian, starts); bump whenever fit_rb changes
+FIT_CACHE_VERSION = b"v2:lsq-jac:generic+loglin-starts"
+PROGRESS_BATCH = 50  # jobs per progress line while fetching
 
 TOTAL_QUBITS = 9
 
+# Shared QI fetch/poll helpers and result caches live next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from qi_fetch import (check_status, fetch_results, load_counts_npz, load_json,
+                      pack_bitstrings, save_counts_npz, save_json)
 
-def rb_model(m, A, p, B):
-    """Standard RB decay model."""
-    return A * p**m + B
-
-
-def compute_survival(counts, qubit, n_total=9):
-    """Compute survival probability (fraction measuring |0⟩) for a qubit."""
-    total = 0
-    n_zero = 0
-    for bs, count in counts.items():
-        bs_pos = n_total - 1 - qubit  # MSB-first
-        bit_val = bs[bs_pos] if bs_pos < len(bs) else '0'
-        if bit_val == '0':
-            n_zero += count
-        total += count
-    return n_zero / total if total > 0 else 0.0
-
-
-def fetch_results(job_data):
-    """Fetch all results from QI."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-    backend = RemoteBackend()
-
-    job_ids = job_data["job_ids"]
-    counts = {}
-    n_done = 0
-    n_pending = 0
-    n_fail = 0
-
-    for name, job_id in job_ids.items():
-        if isinstance(job_id, str) and job_id.startswith("FAILED"):
-            n_fail += 1
-            continue
-        try:
-            job = backend.get_job(int(job_id))
-            status = str(getattr(job, "status", ""))
-
-            if "COMPLETED" in status:
-                raw = backend.get_results(int(job_id))
-                items = raw.items if hasattr(raw, "items") else raw
-                histogram = None
-                for item in items:
-                    if hasattr(item, "results") and item.results:
-                        histogram = item.results
-                        break
-                if histogram:
-                    counts[name] = {k: int(v) for k, v in histogram.items()}
-                    n_done += 1
-                else:
-                    n_fail += 1
-            elif "RUNNING" in status or "PLANNED" in status:
-                n_pending += 1
-            else:
-                n_fail += 1
-        except Exception as e:
-            n_fail += 1
-            print(f"  Error: {name} (job {job_id}): {e}")
-
-        if (n_done + n_pending + n_fail) % 50 == 0:
-            print(f"  Fetched {n_done}, pending {n_pending}, failed {n_fail}")
 
-    print(f"Total: {n_done} done, {n_pending} pending, {n_fail} failed")
-    return counts, n_pending
+RB_GENERIC_START = [0.5, 0.99, 0.5]  # [A, p, B] start of the original curve_fit
 
 
-def check_status(job_data):
-    """Quick status check."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-    backend = RemoteBackend()
-
-    items = list(job_data["job_ids"].items())
-    sample = items[:3] + items[len(items)//2:len(items)//2+3] + items[-3:]
-
-    done = 0
-    pending = 0
-    for name, job_id in sample:
-        if isinstance(job_id, str) and job_id.startswith("FAILED"):
-            continue
-        try:
-            job = backend.get_job(int(job_id))
-            status = str(getattr(job, "status", ""))
-            if "COMPLETED" in status:
-                done += 1
-            else:
-                pending += 1
-        except:
-            pending += 1
-
-    print(f"Sample ({len(sample)} jobs): {done} done, {pending} pending")
-    return pending == 0
+def rb_model(m, A, p, B):
+    """Standard RB decay model."""
+    return A * p**m + B
 
 
-def analyze(counts, job_data):
+def rb_initial_guess(ms, means, stds):
+    """Closed-form [A, p, B] start for rb_model from a weighted line fit on log(mean - B).
+
+    B is taken as the mean of the two longest sequences; points at or below it
+    carry no decay information and are dropped. Falls back to a generic guess
+    when fewer than two points remain.
+    """
+    B0 = float(np.mean(means[-2:]))
+    above = means > B0
+    if above.sum() < 2:
+        return list(RB_GENERIC_START)
+    y = np.log(means[above] - B0)
+    w = 1 / np.maximum(np.asarray(stds)[above], 1e-3)
+    slope, intercept = np.polyfit(ms[above], y, 1, w=w)
+    # The fit needs its start strictly inside the [0, 1] bounds
+    return list(np.clip([np.exp(intercept), np.exp(slope), B0], 1e-6, 1 - 1e-6))
+
+
+def _rb_residuals(x, ms, means):
+    """rb_model(ms, *x) - means."""
+    A, p, B = x
+    return A * p**ms + B - means
+
+
+def _rb_jacobian(x, ms, means):
+    """Analytic d(residual)/d(A, p, B) of rb_model."""
+    A, p, B = x
+    return np.column_stack([p**ms, A * ms * p**(ms - 1), np.ones(len(ms))])
+
+
+def fit_rb(ms, means, stds):
+    """Fit rb_model to one qubit's decay; returns (popt, perr).
+
+    Uses least_squares with the analytic Jacobian from two starts,
+    RB_GENERIC_START and rb_initial_guess(), keeping the fit with the lower
+    cost: the decay can have more than one local minimum inside the [0, 1]
+    bounds, and the seed alone can settle in a worse one. The covariance is
+    formed as curve_fit does. Results are cached in FIT_CACHE_DIR under a
+    hash of FIT_CACHE_VERSION and the fit inputs, so re-analysing unchanged
+    counts skips the fit.
+    """
+    key = hashlib.sha1(b"|".join([FIT_CACHE_VERSION, ms.tobytes(), means.tobytes(),
+                                  stds.tobytes()])).hexdigest()[:16]
+    path = FIT_CACHE_DIR / f"{key}.json"
+    if path.exists():
+        cached = load_json(path)
+        return np.array(cached["popt"]), np.array(cached["perr"])
+    # The generic start the fit always used, then the log-linear seed; the
+    # lower-cost fit wins, the generic start on a tie
+    best = None
+    for x0 in (RB_GENERIC_START, rb_initial_guess(ms, means, stds)):
+        res = least_squares(_rb_residuals, x0, jac=_rb_jacobian,
+                            bounds=([0, 0, 0], [1, 1, 1]),
+                            max_nfev=10000, args=(ms, means))
+        if res.success and (best is None or res.cost < best.cost):
+            best = res
+    if best is None:
+        raise RuntimeError("Optimal parameters not found: " + res.message)
+    res = best
+    popt = res.x
+    # Pseudo-inverse of J^T J (zero singular values dropped), scaled by the residual variance
+    _, sv, VT = np.linalg.svd(res.jac, full_matrices=False)
+    kept = sv > np.finfo(float).eps * max(res.jac.shape) * sv[0]
+    pcov = (VT[kept].T / sv[kept]**2) @ VT[kept]
+    dof = len(ms) - len(popt)
+    pcov = pcov * (2 * res.cost / dof) if dof > 0 else np.full_like(pcov, np.inf)
+    perr = np.sqrt(np.diag(pcov))
+    if np.all(np.isfinite(perr)):  # JSON has no inf/nan
+        FIT_CACHE_DIR.mkdir(exist_ok=True)
+        save_json(path, {"popt": popt.tolist(), "perr": perr.tolist()})
+    return popt, perr
+
+
+def decode_counts(counts, n_total=9):
+    """Counts as parallel arrays (uint16 outcome, shots); bit q of the outcome is qubit q.
+
+    Keys are MSB-first; a short key reads as '0' for its missing qubits.
+    """
+    shots = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    if not all(len(bs) == n_total for bs in counts):
+        counts = [bs[:n_total].ljust(n_total, "0") for bs in counts]
+    return pack_bitstrings(counts, n_total), shots
+
+
+def histogram_distribution(decoded, nbits=TOTAL_QUBITS):
+    """Outcome probabilities as a dense 2**nbits array (one bincount over the shots)."""
+    if isinstance(decoded, dict):
+        decoded = decode_counts(decoded, nbits)
+    idx, shots = decoded
+    total = shots.sum()
+    if total <= 0:
+        return np.zeros(1 << nbits)
+    return np.bincount(idx, weights=shots, minlength=1 << nbits) / total
+
+
+@functools.lru_cache(maxsize=None)
+def _zero_table(n_total):
+    """(2**n_total, n_total) table: entry [i, q] is True when qubit q of outcome i is 0."""
+    return ((np.arange(1 << n_total)[:, None] >> np.arange(n_total)) & 1) == 0
+
+
+def compute_all_survivals(decoded, n_total=9):
+    """Survival probability (fraction measuring |0⟩) of every qubit, indexed by qubit.
+
+    Takes a counts dict or decode_counts() arrays; every qubit's marginal
+    comes from one histogram_distribution() times a fixed zero-bit table.
+    """
+    return histogram_distribution(decoded, n_total) @ _zero_table(n_total)
+
+
+def analyze(decoded, job_data):
     """Full RB analysis: fit decay, extract gate fidelities."""
     seq_lengths = job_data["seq_lengths"]
     n_seeds = job_data["n_seeds"]
 
     results_per_qubit = {}
 
+    # Each histogram is reduced once to all-qubit survivals
+    survivals_by_key = {key: compute_all_survivals(arrays) for key, arrays in decoded.items()}
+
     print(f"\n{'='*65}")
     print(f"  RANDOMIZED BENCHMARKING — TUNA-9 (ALL QUBITS)")
     print(f"{'='*65}")
@@ -138,8 +179,8 @@ def analyze(counts, job_data):
             survivals = []
             for seed in range(n_seeds):
                 key = f"rb_q{qubit}_m{m}_s{seed}"
-                if key in counts:
-                    surv = compute_survival(counts[key], qubit)
+                if key in survivals_by_key:
+                    surv = float(survivals_by_key[key][qubit])
                     survivals.append(surv)
             if survivals:
                 data[m] = survivals
@@ -165,17 +206,12 @@ def analyze(counts, job_data):
 
         ms = np.array(ms)
         means = np.array(means)
+        stds = np.array(stds, dtype=float)
 
         # Fit A*p^m + B
         try:
-            popt, pcov = curve_fit(
-                rb_model, ms, means,
-                p0=[0.5, 0.99, 0.5],
-                bounds=([0, 0, 0], [1, 1, 1]),
-                maxfev=10000
-            )
+            popt, perr = fit_rb(ms, means, stds)
             A_fit, p_fit, B_fit = popt
-            perr = np.sqrt(np.diag(pcov))
 
             # Error per Clifford: EPC = (1-p)(d-1)/d, d=2 for single qubit
             epc = (1 - p_fit) / 2
@@ -229,8 +265,7 @@ def analyze(counts, job_data):
         "results": results_per_qubit,
     }
 
-    with open(ANALYSIS_FILE, "w") as f:
-        json.dump(analysis, f, indent=2)
+    save_json(ANALYSIS_FILE, analysis)
     print(f"\nAnalysis saved to: {ANALYSIS_FILE}")
 
     return analysis
@@ -241,8 +276,7 @@ def main():
         print(f"No job IDs: {JOB_IDS_FILE}")
         sys.exit(1)
 
-    with open(JOB_IDS_FILE) as f:
-        job_data = json.load(f)
+    job_data = load_json(JOB_IDS_FILE)
 
     print(f"RB: {job_data['n_submitted']} circuits submitted")
 
@@ -254,19 +288,24 @@ def main():
         if not RAW_COUNTS_FILE.exists():
             print(f"No cached counts: {RAW_COUNTS_FILE}")
             sys.exit(1)
-        with open(RAW_COUNTS_FILE) as f:
-            counts = json.load(f)
+        decoded = load_counts_npz(RAW_COUNTS_FILE, COUNTS_CACHE, [TOTAL_QUBITS])
+        if decoded is None:
+            decoded = {key: decode_counts(hist)
+                       for key, hist in load_json(RAW_COUNTS_FILE).items()}
+            save_counts_npz(decoded, COUNTS_CACHE, [TOTAL_QUBITS])
     else:
         print("Fetching results...")
-        counts, n_pending = fetch_results(job_data)
+        counts, n_pending = fetch_results(job_data, wait="--wait" in sys.argv,
+                                          progress_every=PROGRESS_BATCH)
         if n_pending > 0:
             print(f"\n{n_pending} jobs still pending.")
             sys.exit(1)
-        with open(RAW_COUNTS_FILE, "w") as f:
-            json.dump(counts, f)
+        save_json(RAW_COUNTS_FILE, counts, indent=False)
         print(f"Cached {len(counts)} results to {RAW_COUNTS_FILE}")
+        decoded = {key: decode_counts(hist) for key, hist in counts.items()}
+        save_counts_npz(decoded, COUNTS_CACHE, [TOTAL_QUBITS])
 
-    analyze(counts, job_data)
+    analyze(decoded, job_data)
 
 
 if __name__ == "__main__":
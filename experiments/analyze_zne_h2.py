@@ -16,7 +16,9 @@ Usage:
 
 import json
 import sys
+import warnings
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -29,114 +31,70 @@ SWEEP_FILE = RESULTS_DIR / "vqe-h2-sweep-tuna9.json"
 QA, QB = 4, 6  # Physical qubits
 FOLDS = [1, 3, 5]
 N_REPS = 5
+CAL_STATES = ["00", "10", "01", "11"]  # (qa, qb) basis order of all 4-vectors
+# Rows: Z0, Z1, Z0Z1 eigenvalue signs over CAL_STATES
+SIGNS = np.array([[1, -1, 1, -1],
+                  [1, 1, -1, -1],
+                  [1, -1, -1, 1]], dtype=np.float64)
+
+# Shared QI fetch/poll and counts helpers live next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from qi_fetch import (FETCH_WORKERS, bit_matrix, fetch_results, get_backend, is_submit_failure,
+                      poll_status)
 
 
 def extract_2q_probs(counts_9bit):
-    """Extract 2-qubit probabilities for qa=4, qb=6 from 9-bit counts."""
-    probs = {"00": 0, "01": 0, "10": 0, "11": 0}
-    total = 0
-    for bs, count in counts_9bit.items():
-        qa_val = bs[8 - QA]  # MSB-first: pos = 8 - qubit_index
-        qb_val = bs[8 - QB]
-        probs[f"{qa_val}{qb_val}"] += count
-        total += count
-    return {k: v / total for k, v in probs.items()}, total
+    """Extract 2-qubit probabilities for qa=4, qb=6 from 9-bit counts.
+
+    Returns (probs, total) with probs ordered as CAL_STATES.
+    """
+    bits = bit_matrix(counts_9bit)
+    shots = np.fromiter(counts_9bit.values(), dtype=np.float64, count=len(counts_9bit))
+    # MSB-first: pos = 8 - qubit_index; index qa + 2*qb follows CAL_STATES
+    c4 = np.bincount(bits[:, 8 - QA] | (bits[:, 8 - QB] << 1), weights=shots, minlength=4)
+    total = int(c4.sum())
+    return c4 / total, total
 
 
 def build_confusion_matrix(cal_counts):
     """Build 4x4 confusion matrix from calibration data."""
-    states = ["00", "10", "01", "11"]
     M = np.zeros((4, 4))
-    for j, prep_state in enumerate(states):
-        probs, _ = extract_2q_probs(cal_counts[prep_state])
-        for i, meas_state in enumerate(states):
-            M[i, j] = probs[meas_state]
+    for j, prep_state in enumerate(CAL_STATES):
+        M[:, j], _ = extract_2q_probs(cal_counts[prep_state])
     return M
 
 
-def apply_rem(probs_dict, M_inv):
-    """Apply REM: corrected = M_inv @ raw_probs."""
-    states = ["00", "10", "01", "11"]
-    raw_vec = np.array([probs_dict[s] for s in states])
-    corrected = M_inv @ raw_vec
-    return {s: float(corrected[i]) for i, s in enumerate(states)}
-
-
 def compute_expvals(probs):
-    """Compute <Z0>, <Z1>, <Z0Z1>, <X0X1>, <Y0Y1> from 2-qubit probs."""
-    p00 = probs.get("00", 0)
-    p01 = probs.get("01", 0)
-    p10 = probs.get("10", 0)
-    p11 = probs.get("11", 0)
+    """Compute <Z0>, <Z1>, <Z0Z1> from 2-qubit probs (a 4-vector, or 4 x N columns)."""
+    return SIGNS @ probs
 
-    z0 = (p00 + p01) - (p10 + p11)
-    z1 = (p00 + p10) - (p01 + p11)
-    z0z1 = (p00 + p11) - (p01 + p10)
-    return z0, z1, z0z1
 
-
-def compute_energy(z_probs, x_probs, y_probs, g0, g1, g4):
-    """Compute H2 energy from measurement results."""
-    _, _, z0z1 = compute_expvals(z_probs)
-    z0, z1, _ = compute_expvals(z_probs)
-    _, _, x0x1 = compute_expvals(x_probs)
-    _, _, y0y1 = compute_expvals(y_probs)
+def compute_energy(z_ev, x_ev, y_ev, g0, g1, g4):
+    """Compute H2 energy from the compute_expvals() of the Z, X and Y measurements."""
+    z0, z1, _ = z_ev
+    x0x1 = x_ev[2]  # ZZ in the rotated basis
+    y0y1 = y_ev[2]
 
     energy = g0 + g1 * (z0 - z1) + g4 * (x0x1 + y0y1)
     return energy
 
 
-def fetch_results(job_data):
-    """Fetch all results from QI."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-    backend = RemoteBackend()
-
-    job_ids = job_data["job_ids"]
-    counts = {}
-    n_done = 0
-    n_pending = 0
-    n_fail = 0
-
-    for name, job_id in job_ids.items():
-        if isinstance(job_id, str) and job_id.startswith("FAILED"):
-            n_fail += 1
-            continue
-        try:
-            job = backend.get_job(int(job_id))
-            status = str(getattr(job, "status", ""))
-
-            if "COMPLETED" in status:
-                raw = backend.get_results(int(job_id))
-                items = raw.items if hasattr(raw, "items") else raw
-                histogram = None
-                for item in items:
-                    if hasattr(item, "results") and item.results:
-                        histogram = item.results
-                        break
-                if histogram:
-                    counts[name] = {k: int(v) for k, v in histogram.items()}
-                    n_done += 1
-                else:
-                    n_fail += 1
-            elif "RUNNING" in status or "PLANNED" in status:
-                n_pending += 1
-            else:
-                n_fail += 1
-        except Exception as e:
-            n_fail += 1
-            print(f"  Error fetching {name} (job {job_id}): {e}")
+def rep_stats(E):
+    """Count, mean and sample std over the last (rep) axis, skipping unmeasured (NaN) reps."""
+    n = np.count_nonzero(~np.isnan(E), axis=-1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN or single-rep rows
+        return n, np.nanmean(E, axis=-1), np.nanstd(E, axis=-1, ddof=1)
 
-        if (n_done + n_pending + n_fail) % 50 == 0:
-            print(f"  Fetched {n_done}, pending {n_pending}, failed {n_fail}")
 
-    print(f"Total: {n_done} done, {n_pending} pending, {n_fail} failed")
-    return counts, n_pending
+def measured(values):
+    """The non-NaN entries of a 1-D energy array, as plain floats."""
+    return [float(v) for v in values[~np.isnan(values)]]
 
 
 def check_status(job_data):
     """Check job completion status."""
-    from quantuminspire.util.api.remote_backend import RemoteBackend
-    backend = RemoteBackend()
+    backend = get_backend()
 
     job_ids = job_data["job_ids"]
     statuses = {"COMPLETED": 0, "RUNNING": 0, "PLANNED": 0, "FAILED": 0, "OTHER": 0}
@@ -145,14 +103,20 @@ def check_status(job_data):
     items = list(job_ids.items())
     sample = items[:5] + items[-5:]
 
-    for name, job_id in sample:
-        if isinstance(job_id, str) and job_id.startswith("FAILED"):
-            statuses["FAILED"] += 1
-            continue
-        try:
-            job = backend.get_job(int(job_id))
-            status = str(getattr(job, "status", ""))
-            if "COMPLETED" in status:
+    submitted = [job_id for _, job_id in sample if not is_submit_failure(job_id)]
+
+    # The sampled statuses are requested concurrently and read back in order
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        polled = ex.map(lambda job_id: poll_status(backend, job_id), submitted)
+        for name, job_id in sample:
+            if is_submit_failure(job_id):
+                statuses["FAILED"] += 1
+                continue
+            status, e = next(polled)
+            if e is not None:
+                statuses["OTHER"] += 1
+                print(f"  {name}: {e}")
+            elif "COMPLETED" in status:
                 statuses["COMPLETED"] += 1
             elif "RUNNING" in status:
                 statuses["RUNNING"] += 1
@@ -162,9 +126,6 @@ def check_status(job_data):
                 statuses["FAILED"] += 1
             else:
                 statuses["OTHER"] += 1
-        except Exception as e:
-            statuses["OTHER"] += 1
-            print(f"  {name}: {e}")
 
     print(f"Sample status ({len(sample)} jobs): {dict(statuses)}")
     if statuses["PLANNED"] > 0 or statuses["RUNNING"] > 0:
@@ -180,7 +141,7 @@ def analyze(counts, job_data):
     # Build confusion matrices from start and end calibration
     cal_start = {}
     cal_end = {}
-    for state in ["00", "10", "01", "11"]:
+    for state in CAL_STATES:
         start_key = f"cal_start_{state}"
         end_key = f"cal_end_{state}"
         if start_key in counts:
@@ -191,10 +152,12 @@ def analyze(counts, job_data):
     if len(cal_start) == 4:
         M_start = build_confusion_matrix(cal_start)
         M_inv_start = np.linalg.inv(M_start)
-        print(f"Start cal condition number: {np.linalg.cond(M_start):.3f}")
+        cond_start = float(np.linalg.cond(M_start))
+        print(f"Start cal condition number: {cond_start:.3f}")
     else:
         print("WARNING: Missing start calibration, skipping REM")
         M_inv_start = None
+        cond_start = None
 
     if len(cal_end) == 4:
         M_end = build_confusion_matrix(cal_end)
@@ -205,99 +168,83 @@ def analyze(counts, job_data):
     else:
         M_end = None
 
-    # Process each distance × fold × rep
-    results_per_distance = []
-
+    # (R, fold, rep) -> Z/X/Y circuit names, for every rep measured in all three bases
+    triplets = {}
     for d in distances:
-        R = d["R"]
-        g0, g1, g4 = d["g0"], d["g1"], d["g4"]
-        fci = d["fci"]
-        hf = d["hf"]
-
-        fold_energies = {}  # fold -> list of energies (5 reps)
-        fold_energies_raw = {}
-
         for fold in FOLDS:
-            rep_energies = []
-            rep_energies_raw = []
-
             for rep in range(N_REPS):
-                z_key = f"f{fold}_rep{rep}_R{R:.3f}_Z"
-                x_key = f"f{fold}_rep{rep}_R{R:.3f}_X"
-                y_key = f"f{fold}_rep{rep}_R{R:.3f}_Y"
-
-                if z_key not in counts or x_key not in counts or y_key not in counts:
-                    continue
-
-                z_probs, _ = extract_2q_probs(counts[z_key])
-                x_probs, _ = extract_2q_probs(counts[x_key])
-                y_probs, _ = extract_2q_probs(counts[y_key])
+                keys = [f"f{fold}_rep{rep}_R{d['R']:.3f}_{basis}" for basis in "ZXY"]
+                if all(key in counts for key in keys):
+                    triplets[(d["R"], fold, rep)] = keys
+    names = [key for keys in triplets.values() for key in keys]
+    column = {key: i for i, key in enumerate(names)}
+    raw_P = np.array([extract_2q_probs(counts[key])[0] for key in names]).reshape(-1, 4).T
+
+    # Expectation values of every measurement, raw and REM-corrected, as matrix products
+    raw_ev = compute_expvals(raw_P)
+    if M_inv_start is not None:
+        rem_ev = compute_expvals(M_inv_start @ raw_P)
+
+    # Energies indexed [fold, distance, rep]; NaN where a rep was not measured in all bases
+    dist_index = {d["R"]: i for i, d in enumerate(distances)}
+    f_i, d_i, r_i = np.array([(FOLDS.index(fold), dist_index[R], rep)
+                              for R, fold, rep in triplets], dtype=int).reshape(-1, 3).T
+    z, x, y = np.array([[column[key] for key in keys]
+                        for keys in triplets.values()], dtype=int).reshape(-1, 3).T
+    g0, g1, g4 = (np.array([d[g] for d in distances])[d_i] for g in ("g0", "g1", "g4"))
+
+    shape = (len(FOLDS), len(distances), N_REPS)
+    E_raw = np.full(shape, np.nan)
+    E_raw[f_i, d_i, r_i] = compute_energy(raw_ev[:, z], raw_ev[:, x], raw_ev[:, y], g0, g1, g4)
+    E_rem = np.full(shape, np.nan)
+    if M_inv_start is not None:
+        E_rem[f_i, d_i, r_i] = compute_energy(rem_ev[:, z], rem_ev[:, x], rem_ev[:, y], g0, g1, g4)
+
+    # Richardson extrapolation of the REM energies, per distance and rep
+    E1, E3, E5 = E_rem
+    zne_energies = {
+        "linear": (3 * E1 - E3) / 2,                     # E(0) = (3*E(1) - E(3)) / 2
+        "quadratic": (15 * E1 - 10 * E3 + 3 * E5) / 8,   # E(0) = (15*E(1) - 10*E(3) + 3*E(5)) / 8
+    }
 
-                # Raw energy (no mitigation)
-                e_raw = compute_energy(z_probs, x_probs, y_probs, g0, g1, g4)
-                rep_energies_raw.append(e_raw)
+    rem_stats = rep_stats(E_rem)
+    raw_stats = rep_stats(E_raw)
+    zne_stats = {method: rep_stats(E) for method, E in zne_energies.items()}
 
-                # REM energy
-                if M_inv_start is not None:
-                    z_rem = apply_rem(z_probs, M_inv_start)
-                    x_rem = apply_rem(x_probs, M_inv_start)
-                    y_rem = apply_rem(y_probs, M_inv_start)
-                    e_rem = compute_energy(z_rem, x_rem, y_rem, g0, g1, g4)
-                    rep_energies.append(e_rem)
+    results_per_distance = []
 
-            fold_energies[fold] = rep_energies
-            fold_energies_raw[fold] = rep_energies_raw
+    for di, d in enumerate(distances):
+        R = d["R"]
+        fci = d["fci"]
+        hf = d["hf"]
 
-        # Compute statistics at each fold
         fold_stats = {}
         fold_stats_raw = {}
-        for fold in FOLDS:
-            if fold_energies[fold]:
-                arr = np.array(fold_energies[fold])
+        for fi, fold in enumerate(FOLDS):
+            n, mean, std = rem_stats
+            if n[fi, di]:
                 fold_stats[fold] = {
-                    "mean": float(np.mean(arr)),
-                    "std": float(np.std(arr, ddof=1)),
-                    "values": [float(x) for x in arr],
+                    "mean": float(mean[fi, di]),
+                    "std": float(std[fi, di]),
+                    "values": measured(E_rem[fi, di]),
                 }
-            if fold_energies_raw[fold]:
-                arr = np.array(fold_energies_raw[fold])
+            n, mean, std = raw_stats
+            if n[fi, di]:
                 fold_stats_raw[fold] = {
-                    "mean": float(np.mean(arr)),
-                    "std": float(np.std(arr, ddof=1)),
+                    "mean": float(mean[fi, di]),
+                    "std": float(std[fi, di]),
                 }
 
-        # Richardson extrapolation (REM energies)
         zne_results = {}
-
-        if all(fold in fold_stats for fold in [1, 3]):
-            # Linear: E(0) = (3*E(1) - E(3)) / 2
-            e1_vals = np.array(fold_stats[1]["values"])
-            e3_vals = np.array(fold_stats[3]["values"])
-            # Per-rep extrapolation
-            n_pairs = min(len(e1_vals), len(e3_vals))
-            linear_vals = (3 * e1_vals[:n_pairs] - e3_vals[:n_pairs]) / 2
-            zne_results["linear"] = {
-                "mean": float(np.mean(linear_vals)),
-                "std": float(np.std(linear_vals, ddof=1)),
-                "error_mHa": float(abs(np.mean(linear_vals) - fci) * 1000),
-                "error_kcal": float(abs(np.mean(linear_vals) - fci) * 627.509),
-                "values": [float(x) for x in linear_vals],
-            }
-
-        if all(fold in fold_stats for fold in [1, 3, 5]):
-            # Quadratic: E(0) = (15*E(1) - 10*E(3) + 3*E(5)) / 8
-            e1_vals = np.array(fold_stats[1]["values"])
-            e3_vals = np.array(fold_stats[3]["values"])
-            e5_vals = np.array(fold_stats[5]["values"])
-            n_trips = min(len(e1_vals), len(e3_vals), len(e5_vals))
-            quad_vals = (15 * e1_vals[:n_trips] - 10 * e3_vals[:n_trips] + 3 * e5_vals[:n_trips]) / 8
-            zne_results["quadratic"] = {
-                "mean": float(np.mean(quad_vals)),
-                "std": float(np.std(quad_vals, ddof=1)),
-                "error_mHa": float(abs(np.mean(quad_vals) - fci) * 1000),
-                "error_kcal": float(abs(np.mean(quad_vals) - fci) * 627.509),
-                "values": [float(x) for x in quad_vals],
-            }
+        for method, (n, mean, std) in zne_stats.items():
+            if n[di]:
+                zne_results[method] = {
+                    "mean": float(mean[di]),
+                    "std": float(std[di]),
+                    "error_mHa": float(abs(mean[di] - fci) * 1000),
+                    "error_kcal": float(abs(mean[di] - fci) * 627.509),
+                    "values": measured(zne_energies[method][di]),
+                }
 
         # Summary for this distance
         rem_only_error = abs(fold_stats[1]["mean"] - fci) * 1000 if 1 in fold_stats else None
@@ -348,7 +295,7 @@ def analyze(counts, job_data):
         "fold_factors": FOLDS,
         "results": results_per_distance,
         "calibration": {
-            "start_condition": float(np.linalg.cond(M_start)) if M_inv_start is not None else None,
+            "start_condition": cond_start,
         },
     }
 
@@ -16,7 +16,9 @@ Bitstring: 9-bit MSB-first
 """
 
 import json
+import sys
 import numpy as np
+from scipy.linalg import lu_factor, lu_solve
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -24,6 +26,15 @@ from datetime import datetime, timezone
 Q0_POS = 4  # q4 → position 4
 Q1_POS = 2  # q6 → position 2
 
+# Shared counts helpers live next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from qi_fetch import bit_matrix
+
+# Rows: Z0, Z1, Z0Z1 eigenvalue signs over outcomes [00, 01, 10, 11]
+SIGNS = np.array([[1, 1, -1, -1],
+                  [1, -1, 1, -1],
+                  [1, -1, -1, 1]], dtype=np.float64)
+
 # Calibration job IDs
 CAL_JOBS = {
     "00": 429920,
@@ -47,14 +58,11 @@ JOB_MAP = {
 def extract_2q_probs(counts: dict, pos0: int, pos1: int) -> np.ndarray:
     """Extract 2-qubit probability vector [P(00), P(01), P(10), P(11)]
     from 9-bit measurement counts, marginalizing over idle qubits."""
-    total = sum(counts.values())
-    probs = np.zeros(4)
-    for bitstring, count in counts.items():
-        b0 = int(bitstring[pos0])
-        b1 = int(bitstring[pos1])
-        idx = b0 * 2 + b1  # 00=0, 01=1, 10=2, 11=3
-        probs[idx] += count
-    return probs / total
+    bits = bit_matrix(counts)
+    shots = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    idx = (bits[:, pos0] << 1) | bits[:, pos1]  # 00=0, 01=1, 10=2, 11=3
+    probs = np.bincount(idx, weights=shots, minlength=4)
+    return probs / probs.sum()
 
 
 def build_confusion_matrix(cal_counts: dict) -> np.ndarray:
@@ -76,19 +84,21 @@ def build_confusion_matrix(cal_counts: dict) -> np.ndarray:
     return M
 
 
-def apply_rem(counts: dict, M_inv: np.ndarray, pos0: int, pos1: int) -> dict:
+def apply_rem(counts: dict, M_lu: tuple, pos0: int, pos1: int) -> dict:
     """Apply REM correction to measurement counts.
 
+    M_lu is the confusion matrix's lu_factor() factorization.
+
     1. Extract 2-qubit probability distribution
-    2. Apply inverse confusion matrix
+    2. Solve M @ corrected = raw
     3. Clip negative probabilities to 0 and renormalize
     4. Return corrected counts (as fractional counts for expectation values)
     """
     total = sum(counts.values())
     raw_probs = extract_2q_probs(counts, pos0, pos1)
 
-    # Apply inverse confusion matrix
-    corrected_probs = M_inv @ raw_probs
+    # Undo the confusion matrix
+    corrected_probs = lu_solve(M_lu, raw_probs)
 
     # Clip negatives and renormalize
     corrected_probs = np.maximum(corrected_probs, 0)
@@ -126,83 +136,44 @@ def compute_expvals_from_2q(counts: dict) -> tuple:
     return z0, z1, z0z1
 
 
+def expval_from_probs(probs: np.ndarray) -> tuple:
+    """(Z0, Z1, Z0Z1) from a probability vector [P(00), P(01), P(10), P(11)]."""
+    return tuple(SIGNS @ probs)
+
+
 def compute_energy(g0, g1, g4, z0, z1, xx, yy):
     """E = g0 + g1*(Z0 - Z1) + g4*(X0X1 + Y0Y1)"""
     return g0 + g1 * (z0 - z1) + g4 * (xx + yy)
 
 
-def bootstrap_rem_energy(counts_z, counts_x, counts_y, M_inv, g0, g1, g4,
+def bootstrap_rem_energy(counts_z, counts_x, counts_y, M_lu, g0, g1, g4,
                          n_bootstrap=1000, seed=42):
-    """Bootstrap energy error estimate for REM-corrected data."""
-    rng = np.random.RandomState(seed)
-
-    # Get raw 2q distributions for resampling
-    def get_2q_samples(counts):
-        total = sum(counts.values())
-        samples = []
-        for bitstring, count in counts.items():
-            b0 = int(bitstring[Q0_POS]) if len(bitstring) == 9 else int(bitstring[0])
-            b1 = int(bitstring[Q1_POS]) if len(bitstring) == 9 else int(bitstring[1])
-            label = f"{b0}{b1}"
-            samples.extend([label] * int(count))
-        return samples, total
-
-    samples_z, n_z = get_2q_samples(counts_z)
-    samples_x, n_x = get_2q_samples(counts_x)
-    samples_y, n_y = get_2q_samples(counts_y)
-
-    energies = []
-    for _ in range(n_bootstrap):
-        # Resample
-        rs_z = rng.choice(samples_z, size=n_z, replace=True)
-        rs_x = rng.choice(samples_x, size=n_x, replace=True)
-        rs_y = rng.choice(samples_y, size=n_y, replace=True)
-
-        # Count
-        def count_samples(rs):
-            c = {}
-            for s in rs:
-                c[s] = c.get(s, 0) + 1
-            return c
-
-        rc_z = count_samples(rs_z)
-        rc_x = count_samples(rs_x)
-        rc_y = count_samples(rs_y)
-
-        # Apply REM
-        total_z = sum(rc_z.values())
-        total_x = sum(rc_x.values())
-        total_y = sum(rc_y.values())
-
-        probs_z = np.zeros(4)
-        probs_x = np.zeros(4)
-        probs_y = np.zeros(4)
-        labels = ["00", "01", "10", "11"]
-        for i, lab in enumerate(labels):
-            probs_z[i] = rc_z.get(lab, 0) / total_z
-            probs_x[i] = rc_x.get(lab, 0) / total_x
-            probs_y[i] = rc_y.get(lab, 0) / total_y
-
-        corr_z = np.maximum(M_inv @ probs_z, 0)
-        corr_x = np.maximum(M_inv @ probs_x, 0)
-        corr_y = np.maximum(M_inv @ probs_y, 0)
-        corr_z /= corr_z.sum() if corr_z.sum() > 0 else 1
-        corr_x /= corr_x.sum() if corr_x.sum() > 0 else 1
-        corr_y /= corr_y.sum() if corr_y.sum() > 0 else 1
-
-        # Compute expectation values from corrected probs
-        def expval_from_probs(probs):
-            z0 = (probs[0] + probs[1]) - (probs[2] + probs[3])
-            z1 = (probs[0] + probs[2]) - (probs[1] + probs[3])
-            zz = (probs[0] + probs[3]) - (probs[1] + probs[2])
-            return z0, z1, zz
-
-        z0, z1, _ = expval_from_probs(corr_z)
-        xx_z0, xx_z1, xx = expval_from_probs(corr_x)
-        yy_z0, yy_z1, yy = expval_from_probs(corr_y)
-
-        energies.append(compute_energy(g0, g1, g4, z0, z1, xx, yy))
+    """Bootstrap energy error estimate for REM-corrected data.
 
+    Resampling a basis' shots with replacement is a multinomial draw over
+    its four 2-qubit outcomes, so all resamples come from one draw per basis.
+    """
+    rng = np.random.default_rng(seed)
+
+    expvals = []
+    for counts in (counts_z, counts_x, counts_y):
+        n_shots = sum(counts.values())
+        # 9-bit hardware keys hold q4/q6 at Q0_POS/Q1_POS; 2-bit keys are "q4q6"
+        if len(next(iter(counts))) == 9:
+            probs = extract_2q_probs(counts, Q0_POS, Q1_POS)
+        else:
+            probs = extract_2q_probs(counts, 0, 1)
+        # (4, n_bootstrap): one resampled distribution per column
+        resampled = rng.multinomial(n_shots, probs, size=n_bootstrap).T / n_shots
+
+        # Apply REM, clip negatives and renormalize every resample at once
+        corr = np.maximum(lu_solve(M_lu, resampled), 0)
+        norm = corr.sum(axis=0)
+        corr /= np.where(norm > 0, norm, 1)
+        expvals.append(SIGNS @ corr)  # rows: Z0, Z1, Z0Z1
+
+    ev_z, ev_x, ev_y = expvals
+    energies = compute_energy(g0, g1, g4, ev_z[0], ev_z[1], ev_x[2], ev_y[2])
     return float(np.std(energies))
 
 
@@ -238,8 +209,8 @@ if __name__ == "__main__":
     print(f"  q4: P(1|0) = {e0_0to1:.4f}, P(0|1) = {e0_1to0:.4f}")
     print(f"  q6: P(1|0) = {e1_0to1:.4f}, P(0|1) = {e1_1to0:.4f}")
 
-    # Invert
-    M_inv = np.linalg.inv(M)
+    # Factorize once; every correction is then a solve against the LU factors
+    M_lu = lu_factor(M)
     cond = np.linalg.cond(M)
     print(f"\nConfusion matrix condition number: {cond:.2f}")
 
@@ -275,26 +246,17 @@ if __name__ == "__main__":
         counts_x = raw_counts[str(jobs["X"])]
         counts_y = raw_counts[str(jobs["Y"])]
 
-        # Raw expectation values (for comparison)
-        raw_probs_z = extract_2q_probs(counts_z, Q0_POS, Q1_POS)
-        raw_probs_x = extract_2q_probs(counts_x, Q0_POS, Q1_POS)
-        raw_probs_y = extract_2q_probs(counts_y, Q0_POS, Q1_POS)
+        # Raw probabilities, one column per basis (Z, X, Y)
+        raw_probs = np.column_stack([extract_2q_probs(c, Q0_POS, Q1_POS)
+                                     for c in (counts_z, counts_x, counts_y)])
+        raw_probs_z, raw_probs_x, raw_probs_y = raw_probs.T
 
-        # REM-corrected
-        corr_probs_z = np.maximum(M_inv @ raw_probs_z, 0)
-        corr_probs_x = np.maximum(M_inv @ raw_probs_x, 0)
-        corr_probs_y = np.maximum(M_inv @ raw_probs_y, 0)
-        corr_probs_z /= corr_probs_z.sum()
-        corr_probs_x /= corr_probs_x.sum()
-        corr_probs_y /= corr_probs_y.sum()
+        # REM-corrected: all three bases in one solve, clipped and renormalized per column
+        corr_probs = np.maximum(lu_solve(M_lu, raw_probs), 0)
+        corr_probs /= corr_probs.sum(axis=0)
+        corr_probs_z, corr_probs_x, corr_probs_y = corr_probs.T
 
         # Expectation values from corrected probabilities
-        def expval_from_probs(probs):
-            z0 = (probs[0] + probs[1]) - (probs[2] + probs[3])
-            z1 = (probs[0] + probs[2]) - (probs[1] + probs[3])
-            zz = (probs[0] + probs[3]) - (probs[1] + probs[2])
-            return z0, z1, zz
-
         z0, z1, z0z1 = expval_from_probs(corr_probs_z)
         _, _, xx = expval_from_probs(corr_probs_x)  # ZZ in rotated basis = XX
         _, _, yy = expval_from_probs(corr_probs_y)  # ZZ in rotated basis = YY
@@ -310,7 +272,7 @@ if __name__ == "__main__":
         raw_error_mha = abs(raw_energy - fci) * 1000
 
         # Bootstrap error
-        sigma = bootstrap_rem_energy(counts_z, counts_x, counts_y, M_inv, g0, g1, g4)
+        sigma = bootstrap_rem_energy(counts_z, counts_x, counts_y, M_lu, g0, g1, g4)
 
         result = {
             "bond_distance": R,
@@ -0,0 +1,309 @@
+"""Shared helpers for the analyze_* scripts: QI fetch/poll, counts decoding, result caches.
+
+Job statuses that can no longer change are cached for the run, completed
+jobs are fetched with a single get_results call, and requests overlap in a
+thread pool.
+"""
+
+import json
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from itertools import batched
+except ImportError:  # Python < 3.12
+    from itertools import islice
+
+    def batched(iterable, n):
+        """Successive n-tuples of iterable; the last one may be shorter."""
+        it = iter(iterable)
+        while batch := tuple(islice(it, n)):
+            yield batch
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FETCH_WORKERS = 16  # concurrent QI API requests (fetching is latency-bound)
+
+
+def load_json(path):
+    """Read a JSON file (orjson when installed, else stdlib json)."""
+    data = Path(path).read_bytes()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def save_json(path, obj, indent=True):
+    """Write obj as JSON (orjson when installed, else stdlib json)."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        Path(path).write_bytes(orjson.dumps(obj, option=option))
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2 if indent else None)
+
+
+def pack_bitstrings(keys, width):
+    """MSB-first bitstrings of one width (<= 16) packed as uint16 integers, int(k, 2)."""
+    bits = np.frombuffer("".join(keys).encode("ascii"), dtype=np.uint8)
+    bits = bits.reshape(len(keys), width) - ord("0")
+    return (bits @ (1 << np.arange(width - 1, -1, -1))).astype(np.uint16)
+
+
+def bit_matrix(counts):
+    """Bits of every bitstring key in counts as an (n_keys, n_bits) uint8 array.
+
+    One bytes view over the joined keys replaces per-character int() calls.
+    """
+    joined = "".join(counts).encode("ascii")
+    return np.frombuffer(joined, dtype=np.uint8).reshape(len(counts), -1) - ord("0")
+
+
+def save_counts_npz(decoded, path, layout):
+    """Store decoded (outcomes, shots) arrays per circuit so re-runs skip JSON parsing.
+
+    layout is the list of ints the outcomes were decoded with (e.g. the
+    physical qubits); load_counts_npz only accepts a cache with the same one.
+    """
+    arrays = {"decode_layout": np.array(layout, dtype=np.int64)}
+    for name, (outcomes, shots) in decoded.items():
+        arrays[f"{name}_bs"] = outcomes
+        arrays[f"{name}_v"] = shots.astype(np.int32)
+    np.savez_compressed(path, **arrays)
+
+
+def load_counts_npz(counts_file, path, layout):
+    """Decoded counts from the npz cache at path, or None if missing or stale.
+
+    Stale means older than counts_file or decoded with a different layout.
+    """
+    if not path.exists() or path.stat().st_mtime < counts_file.stat().st_mtime:
+        return None
+    with np.load(path) as cache:
+        if "decode_layout" not in cache.files or cache["decode_layout"].tolist() != list(layout):
+            return None
+        names = [k[:-3] for k in cache.files if k.endswith("_bs")]
+        return {name: (cache[f"{name}_bs"], cache[f"{name}_v"].astype(np.int64))
+                for name in names}
+
+
+_backend = None  # shared RemoteBackend, created on first use
+
+
+def get_backend():
+    """Lazy-init the QI RemoteBackend, reused for every request in this run."""
+    global _backend
+    if _backend is None:
+        from quantuminspire.util.api.remote_backend import RemoteBackend
+        _backend = RemoteBackend()
+    return _backend
+
+
+def is_pending(status):
+    """True for a job status that may still complete (RUNNING or PLANNED)."""
+    return "RUNNING" in status or "PLANNED" in status
+
+
+def is_submit_failure(job_id):
+    """True for a job-ids entry recording a failed submission instead of a job id."""
+    return isinstance(job_id, str) and job_id.startswith("FAILED")
+
+
+_final_status = {}  # job_id -> status that can no longer change, cached for this run
+
+
+def job_status(backend, job_id):
+    """A job's status string; final statuses are served from _final_status."""
+    status = _final_status.get(job_id)
+    if status is None:
+        status = str(getattr(backend.get_job(int(job_id)), "status", ""))
+        if not is_pending(status):
+            _final_status[job_id] = status
+    return status
+
+
+def poll_status(backend, job_id):
+    """(status, error) for one job, via the status cache; runs in a worker thread."""
+    try:
+        return job_status(backend, job_id), None
+    except Exception as e:
+        return None, e
+
+
+def _results_histogram(backend, job_id):
+    """The first non-empty histogram among a job's results, or None."""
+    raw = backend.get_results(int(job_id))
+    items = raw.items if hasattr(raw, "items") else (raw or [])
+    for item in items:
+        if hasattr(item, "results") and item.results:
+            return item.results
+    return None
+
+
+def _is_missing_results(e):
+    """True for the API error of a job that has no results yet (HTTP 404)."""
+    return getattr(e, "status", None) == 404
+
+
+def _get_job_with_cached_status(backend, job_id):
+    """A job's (status, histogram), in a single API call once it has completed.
+
+    Results are requested first; get_job is only called for a job that has
+    none yet, to tell pending from failed. A completed job therefore costs
+    one round-trip instead of two, but a pending or failed one costs two
+    (get_results, then get_job) instead of one. wait_for_completion polls
+    pending jobs by status only for that reason.
+    """
+    status = _final_status.get(job_id)
+    if status is not None and "COMPLETED" not in status:
+        return status, None
+    try:
+        histogram = _results_histogram(backend, job_id)
+    except Exception as e:
+        if not _is_missing_results(e):
+            raise  # auth, network, rate limit, ...: reported by fetch_one
+        histogram = None
+    if histogram:
+        _final_status[job_id] = "COMPLETED"
+        return "COMPLETED", histogram
+    status = job_status(backend, job_id)
+    if "COMPLETED" in status:
+        # Finished between the two requests: ask for its results once more
+        return status, _results_histogram(backend, job_id)
+    return status, None
+
+
+def fetch_one(backend, job_id):
+    """Fetch one job's status and, if completed, its histogram.
+
+    Returns (status, histogram, error); runs in a worker thread. See
+    _get_job_with_cached_status for the API calls this costs per job.
+    """
+    try:
+        return (*_get_job_with_cached_status(backend, job_id), None)
+    except Exception as e:
+        return None, None, e
+
+
+def _poll_pending(backend, job_id):
+    """(status, histogram, error) for a job that was pending; runs in a worker thread.
+
+    One get_job per poll; get_results is only called once the job has completed.
+    """
+    status, e = poll_status(backend, job_id)
+    if e is not None or "COMPLETED" not in status:
+        return status, None, e
+    try:
+        return status, _results_histogram(backend, job_id), None
+    except Exception as e:
+        return status, None, e
+
+
+def wait_for_completion(ex, backend, pending, initial=1.0, max_interval=30.0, factor=1.5):
+    """Re-poll only the pending jobs, with exponential backoff, until they finish.
+
+    pending maps name -> job_id. Returns name -> final (status, histogram,
+    error) as given by fetch_one; ex is the executor to poll with.
+    """
+    final = {}
+    interval = initial
+    while pending:
+        print(f"  Waiting {interval:.0f}s for {len(pending)} pending jobs...")
+        time.sleep(interval)
+        interval = min(max_interval, interval * factor)
+        polled = ex.map(lambda job_id: _poll_pending(backend, job_id), pending.values())
+        still_pending = {}
+        for (name, job_id), result in zip(pending.items(), polled):
+            status, _, e = result
+            if e is None and is_pending(status):
+                still_pending[name] = job_id
+            else:
+                final[name] = result
+        pending = still_pending
+    return final
+
+
+def fetch_results(job_data, wait=False, progress_every=50):
+    """Fetch all results from QI; with wait, keep polling until no job is pending.
+
+    Returns (counts, n_pending), counts mapping circuit name -> histogram.
+    A progress line is printed every progress_every jobs.
+    """
+    backend = get_backend()
+
+    job_ids = job_data["job_ids"]
+    counts = {}
+    n_done = 0
+    n_pending = 0
+    n_fail = 0
+    pending = {}
+
+    submitted = [job_id for job_id in job_ids.values() if not is_submit_failure(job_id)]
+
+    # Requests overlap in a thread pool; results are consumed in job order
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        fetched = ex.map(lambda job_id: fetch_one(backend, job_id), submitted)
+        for batch in batched(job_ids.items(), progress_every):
+            for name, job_id in batch:
+                if is_submit_failure(job_id):
+                    n_fail += 1
+                    continue
+                status, histogram, e = next(fetched)
+                if e is not None:
+                    n_fail += 1
+                    print(f"  Error fetching {name} (job {job_id}): {e}")
+                elif "COMPLETED" in status:
+                    if histogram:
+                        counts[name] = {k: int(v) for k, v in histogram.items()}
+                        n_done += 1
+                    else:
+                        n_fail += 1
+                elif is_pending(status):
+                    n_pending += 1
+                    pending[name] = job_id
+                else:
+                    n_fail += 1
+            print(f"  Fetched {n_done}, pending {n_pending}, failed {n_fail}")
+
+        if wait and pending:
+            final = wait_for_completion(ex, backend, pending)
+            for name, (status, histogram, e) in final.items():
+                n_pending -= 1
+                if e is None and "COMPLETED" in status and histogram:
+                    counts[name] = {k: int(v) for k, v in histogram.items()}
+                    n_done += 1
+                else:
+                    n_fail += 1
+                    if e is not None:
+                        job_id = pending[name]
+                        print(f"  Error fetching {name} (job {job_id}): {e}")
+
+    print(f"Total: {n_done} done, {n_pending} pending, {n_fail} failed")
+    return counts, n_pending
+
+
+def check_status(job_data):
+    """Quick status check on a sample of jobs (first, middle and last three)."""
+    backend = get_backend()
+
+    items = list(job_data["job_ids"].items())
+    sample = items[:3] + items[len(items)//2:len(items)//2+3] + items[-3:]
+
+    done = 0
+    pending = 0
+    for name, job_id in sample:
+        if is_submit_failure(job_id):
+            continue
+        try:
+            if "COMPLETED" in job_status(backend, job_id):
+                done += 1
+            else:
+                pending += 1
+        except:
+            pending += 1
+
+    print(f"Sample ({len(sample)} jobs): {done} done, {pending} pending")
+    return pending == 0
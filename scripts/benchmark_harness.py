@@ -12,18 +12,33 @@ Usage:
     secret-lover run -- python scripts/benchmark_harness.py --resume              # Resume from checkpoint
     secret-lover run -- python scripts/benchmark_harness.py --task-id 42         # Single task
     secret-lover run -- python scripts/benchmark_harness.py --model gemini-2.5-pro  # Different model
+    secret-lover run -- python scripts/benchmark_harness.py --concurrency 16     # LLM calls in flight
+    secret-lover run -- python scripts/benchmark_harness.py --test-concurrency 4 # Tests run at once
+    secret-lover run -- python scripts/benchmark_harness.py --limit-affinity     # Pin to 16 cores on big hosts
+    secret-lover run -- python scripts/benchmark_harness.py --cache              # Replay cached completions
 """
 
 import json
-import subprocess
 import sys
 import time
 import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
+import importlib
+import io
+import multiprocessing
 import os
+import random
 import re
+import threading
+import traceback
 from pathlib import Path
 from datetime import datetime
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 
 try:
     from google import genai
@@ -35,6 +50,16 @@ try:
 except ImportError:
     anthropic = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 # --- Configuration ---
 
 MODEL = "gemini-3-flash-preview"
@@ -42,8 +67,30 @@ DATASET_STANDARD = "qiskit_humaneval.json"
 DATASET_HARD = "qiskit_humaneval_hard.json"
 RESULTS_DIR = Path("benchmark_results")
 EXECUTION_TIMEOUT = 60  # seconds per task execution
+MAX_OUTPUT_BYTES = 1_000_000  # per stream; a test that prints more is killed
+TRUNCATED_MARKER = f"\n[output truncated at {MAX_OUTPUT_BYTES} bytes]"
 MAX_TOKENS = 8192
+# Initial output cap per task difficulty. Canonical solutions run to ~170
+# (basic) and ~230 (intermediate) tokens, so the caps leave room for verbose
+# answers and for thinking tokens, which Gemini counts against the cap.
+# Completions that finish under the cap cost the same either way; the saving
+# is on runaway outputs, which stop at 1024/2048 tokens instead of 8192.
+# call_llm_async doubles the cap (up to MAX_TOKENS) and re-sends the request
+# only when the provider reports the cap was hit (stop_reason "max_tokens" /
+# finish_reason MAX_TOKENS).
+MAX_TOKENS_BY_DIFFICULTY = {"basic": 1024, "intermediate": 2048, "difficult": MAX_TOKENS}
 CHEATSHEET_PATH = Path("QISKIT_2X_CHEATSHEET.md")
+# Environment passed to test subprocesses: what Python, the active
+# virtualenv/conda env and Qiskit/IBM Quantum credentials need, but not the
+# harness's LLM API keys, which test code has no use for
+TEST_ENV_VARS = (
+    "PATH", "HOME", "USER", "PYTHONPATH", "TMPDIR", "LANG", "LC_ALL", "SYSTEMROOT",
+    "VIRTUAL_ENV", "CONDA_PREFIX", "LD_LIBRARY_PATH", "SSL_CERT_FILE", "REQUESTS_CA_BUNDLE",
+    "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "http_proxy", "https_proxy", "no_proxy",
+)
+TEST_ENV_PREFIXES = ("QISKIT_", "IBM_")
+TEST_ENV = {k: v for k, v in os.environ.items()
+            if k in TEST_ENV_VARS or k.startswith(TEST_ENV_PREFIXES)}
 
 SYSTEM_PROMPT = """\
 You are a Qiskit quantum computing expert. You will be given a Python function \
@@ -65,76 +112,163 @@ Here is a reference of current correct APIs:
 
 {cheatsheet}"""
 
+CONTEXT7_URL = "https://context7.com/api/v2/context"
 CONTEXT7_LIBS = ["/qiskit/qiskit", "/qiskit/qiskit-ibm-runtime"]
 CONTEXT7_TOKENS = 1500  # max tokens of docs to retrieve per library
 CONTEXT7_CACHE_FILE = Path("benchmark_results/context7_cache.json")
+LLM_CACHE_FILE = RESULTS_DIR / "llm_cache.jsonl"
+CHECKPOINT_SNAPSHOT_EVERY = 10  # tasks between full-JSON checkpoint snapshots
+
+
+def json_dumps(obj, indent=False):
+    """Serialize obj to JSON bytes (orjson when installed, else stdlib json)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
 
+def json_loads(data):
+    """Parse JSON from bytes or str (orjson when installed, else stdlib json)."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
 
+
+def write_json(path, obj, indent=False):
+    """Write obj to path as JSON."""
+    with open(path, "wb") as f:
+        f.write(json_dumps(obj, indent=indent))
+
+
+@functools.lru_cache(maxsize=1)
 def load_cheatsheet():
-    """Load the Qiskit 2.x API cheatsheet for RAG injection."""
+    """Load the Qiskit 2.x API cheatsheet for RAG injection (read once per run)."""
     if CHEATSHEET_PATH.exists():
         return CHEATSHEET_PATH.read_text()
     return ""
 
 
+@functools.lru_cache(maxsize=1)
+def cheatsheet_system_suffix():
+    """System-prompt suffix for --rag cheatsheet, formatted once."""
+    cheatsheet = load_cheatsheet()
+    return RAG_SUFFIX.format(cheatsheet=cheatsheet) if cheatsheet else ""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: refills at `rate` tokens/s, holds at most `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # Reserve a token even if it isn't there yet; a negative balance
+            # queues later callers behind this one.
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+# Context7 free tier: 60 requests/hour
+CONTEXT7_BUCKET = TokenBucket(rate=60 / 3600, burst=2)
+MAX_RETRIES = 5
+
+
+def backoff_delay(attempt, retry_after=None, base=2.0, cap=300.0, jitter=1.0):
+    """Seconds to wait before retry `attempt` (0-based).
+
+    Honours a Retry-After header value (seconds or HTTP date) when given,
+    otherwise uses capped exponential backoff with jitter.
+    """
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                return min(cap, max(0.0, when.timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return min(cap, base * 2 ** attempt) + random.uniform(0, jitter)
+
+
+def _is_retryable(status):
+    return status is not None and (status == 429 or status >= 500)
+
+
+@functools.lru_cache(maxsize=1)
+def _context7_client():
+    """Shared keep-alive HTTP client for Context7 (HTTP/2 when h2 is installed)."""
+    if httpx is None:
+        raise RuntimeError("httpx is required for Context7 queries (pip install httpx)")
+    api_key = os.environ.get("CONTEXT7_API_KEY", "")
+    kwargs = dict(
+        timeout=15,
+        headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+        limits=httpx.Limits(max_keepalive_connections=4),
+    )
+    try:
+        return httpx.Client(http2=True, **kwargs)
+    except ImportError:  # h2 not installed
+        return httpx.Client(**kwargs)
+
+
+def _fetch_context7(params):
+    """GET Context7 docs through the rate limiter, retrying 429/5xx responses."""
+    client = _context7_client()
+    for attempt in range(MAX_RETRIES + 1):
+        CONTEXT7_BUCKET.acquire()
+        resp = client.get(CONTEXT7_URL, params=params)
+        if not _is_retryable(resp.status_code) or attempt == MAX_RETRIES:
+            resp.raise_for_status()
+            return resp.text
+        delay = backoff_delay(attempt, resp.headers.get("Retry-After"))
+        print(f"  [context7 HTTP {resp.status_code}, retrying in {delay:.0f}s...]")
+        time.sleep(delay)
+
+
 def query_context7(task_prompt, tokens=CONTEXT7_TOKENS):
     """Fetch relevant Qiskit docs from Context7 for a given task prompt.
 
-    Queries both qiskit core and qiskit-ibm-runtime libraries.
+    Queries both qiskit core and qiskit-ibm-runtime libraries (concurrently,
+    over one pooled connection).
     Returns concatenated doc snippets.
     """
-    import urllib.request
-    import urllib.parse
-
-    # Extract key terms from the task prompt (function name + imports + docstring)
-    snippets = []
-    api_key = os.environ.get("CONTEXT7_API_KEY", "")
-    for lib_id in CONTEXT7_LIBS:
-        query = urllib.parse.urlencode({
-            "libraryId": lib_id,
-            "query": task_prompt[:500],  # first 500 chars have the signature + docstring
-            "tokens": tokens,
-        })
-        url = f"https://context7.com/api/v2/context?{query}"
+    def fetch(lib_id):
         try:
-            req = urllib.request.Request(url)
-            if api_key:
-                req.add_header("Authorization", f"Bearer {api_key}")
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                text = resp.read().decode()
-                if text.strip():
-                    snippets.append(text.strip())
+            return _fetch_context7({
+                "libraryId": lib_id,
+                "query": task_prompt[:500],  # first 500 chars have the signature + docstring
+                "tokens": tokens,
+            }).strip()
         except Exception as e:
-            if "429" in str(e):
-                # Rate limited — wait and retry once
-                print(f"  [context7 rate limited, waiting 65s...]")
-                time.sleep(65)
-                try:
-                    req2 = urllib.request.Request(url)
-                    if api_key:
-                        req2.add_header("Authorization", f"Bearer {api_key}")
-                    with urllib.request.urlopen(req2, timeout=15) as resp2:
-                        text = resp2.read().decode()
-                        if text.strip():
-                            snippets.append(text.strip())
-                except Exception as e2:
-                    print(f"  [context7 retry failed: {lib_id}: {e2}]")
-            else:
-                print(f"  [context7 warning: {lib_id}: {e}]")
+            print(f"  [context7 warning: {lib_id}: {e}]")
+            return ""
+
+    with ThreadPoolExecutor(max_workers=len(CONTEXT7_LIBS)) as ex:
+        snippets = [text for text in ex.map(fetch, CONTEXT7_LIBS) if text]
     return "\n\n---\n\n".join(snippets) if snippets else ""
 
 
-def build_context7_cache(hard=False, delay=65):
-    """Pre-fetch Context7 docs for all tasks with rate-limiting delays.
+def build_context7_cache(hard=False):
+    """Pre-fetch Context7 docs for all tasks.
 
     Saves a JSON cache mapping task_id -> docs string.
-    Respects Context7's 60 req/hour free tier by waiting between requests.
+    Requests are paced by CONTEXT7_BUCKET to stay within Context7's
+    60 req/hour free tier.
     """
     tasks = load_dataset(hard=hard)
     cache = {}
     if CONTEXT7_CACHE_FILE.exists():
-        with open(CONTEXT7_CACHE_FILE) as f:
-            cache = json.load(f)
+        cache = json_loads(CONTEXT7_CACHE_FILE.read_bytes())
         print(f"Loaded existing cache with {len(cache)} entries")
 
     remaining = [t for t in tasks if t["task_id"] not in cache]
@@ -148,56 +282,39 @@ def build_context7_cache(hard=False, delay=65):
             cache[task_id] = docs
             print(f"  Got {len(docs)} chars")
         else:
-            print(f"  WARNING: No docs returned (rate limited?)")
-            # Save progress and wait longer
-            with open(CONTEXT7_CACHE_FILE, "w") as f:
-                json.dump(cache, f)
-            print(f"  Saved {len(cache)} cached entries. Waiting {delay*2}s...")
-            time.sleep(delay * 2)
-            # Retry once
-            docs = query_context7(task["prompt"])
-            if docs:
-                cache[task_id] = docs
-                print(f"  Retry OK: {len(docs)} chars")
-            else:
-                print(f"  Retry failed. Skipping.")
-                continue
+            print(f"  WARNING: No docs returned. Skipping.")
+            continue
 
         # Save checkpoint
         if (i + 1) % 5 == 0:
-            with open(CONTEXT7_CACHE_FILE, "w") as f:
-                json.dump(cache, f)
+            write_json(CONTEXT7_CACHE_FILE, cache)
             print(f"  [checkpoint: {len(cache)} cached]")
 
-        # Rate limit: ~1 request per minute (we make 2 per task to 2 libs)
-        if i < len(remaining) - 1:
-            print(f"  Waiting {delay}s for rate limit...")
-            time.sleep(delay)
-
-    with open(CONTEXT7_CACHE_FILE, "w") as f:
-        json.dump(cache, f)
+    write_json(CONTEXT7_CACHE_FILE, cache)
     print(f"\nDone! Cache has {len(cache)}/{len(tasks)} tasks")
     return cache
 
 
+@functools.lru_cache(maxsize=1)
 def load_context7_cache():
     """Load pre-built Context7 cache."""
     if CONTEXT7_CACHE_FILE.exists():
-        with open(CONTEXT7_CACHE_FILE) as f:
-            return json.load(f)
+        return json_loads(CONTEXT7_CACHE_FILE.read_bytes())
     return {}
 
 
+@functools.lru_cache(maxsize=2)
 def load_dataset(hard=False):
-    path = DATASET_HARD if hard else DATASET_STANDARD
-    with open(path) as f:
-        return json.load(f)
+    """Load the task list (parsed once per variant; callers must not mutate it)."""
+    return json_loads(Path(DATASET_HARD if hard else DATASET_STANDARD).read_bytes())
+
+
+_FENCE_RE = re.compile(r'```(?:python)?\s*\n(.*?)```', re.DOTALL)
 
 
 def strip_markdown_fences(text):
     """Remove markdown code fences from LLM output."""
-    pattern = r'```(?:python)?\s*\n(.*?)```'
-    matches = re.findall(pattern, text, re.DOTALL)
+    matches = _FENCE_RE.findall(text)
     if matches:
         return "\n".join(matches)
     return text
@@ -210,23 +327,156 @@ def detect_provider(model):
     return "google"
 
 
-def call_llm(prompt, hard=False, model=MODEL, rag=False, task_id=None, context7_cache=None):
-    """Send a task prompt to the LLM and get the completion."""
+@functools.lru_cache(maxsize=1)
+def _anthropic_client(api_key):
+    """Shared async Claude client, so all tasks reuse one connection pool."""
+    return anthropic.AsyncAnthropic(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=1)
+def _gemini_client():
+    """Shared Gemini client; its .aio transport is reused across tasks."""
+    return genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+
+
+async def _complete_anthropic(model, system, user_msg, max_out):
+    """Run one Claude completion. Returns (text, input_tokens, output_tokens, truncated)."""
+    api_key = os.environ.get("ANTHROPIC_API_KEY", "")
+    if api_key and anthropic is not None:
+        # Use SDK directly if API key available
+        client = _anthropic_client(api_key)
+        response = await client.messages.create(
+            model=model,
+            max_tokens=max_out,
+            system=system,
+            messages=[{"role": "user", "content": user_msg}],
+            temperature=0,
+        )
+        return (response.content[0].text, response.usage.input_tokens,
+                response.usage.output_tokens, response.stop_reason == "max_tokens")
+
+    # Fall back to claude CLI (pipe via stdin to handle long prompts)
+    full_prompt = f"{system}\n\n{user_msg}"
+    proc = await asyncio.create_subprocess_exec(
+        "claude", "-p", "-", "--model", model, "--output-format", "text",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(full_prompt.encode()), 120)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise TimeoutError("claude CLI timed out after 120s")
+    text, stderr = out.decode(), err.decode()
+    if proc.returncode != 0:
+        raise RuntimeError(f"claude CLI error: {stderr[:200]}")
+    if not text.strip():
+        raise RuntimeError(f"claude CLI returned empty output (stderr: {stderr[:200]})")
+    return text, len(full_prompt) // 4, len(text) // 4, False
+
+
+async def _complete_gemini(model, system, user_msg, max_out):
+    """Run one Gemini completion. Returns (text, input_tokens, output_tokens, truncated)."""
+    client = _gemini_client()
+    try:
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(
+                model=model,
+                config=genai.types.GenerateContentConfig(
+                    system_instruction=system,
+                    max_output_tokens=max_out,
+                    temperature=0,
+                ),
+                contents=user_msg,
+            ),
+            120,
+        )
+    except asyncio.TimeoutError:
+        raise TimeoutError("Gemini API call timed out after 120s")
+    finish_reason = response.candidates[0].finish_reason if response.candidates else None
+    truncated = getattr(finish_reason, "name", finish_reason) == "MAX_TOKENS"
+    return (response.text or "", response.usage_metadata.prompt_token_count or 0,
+            response.usage_metadata.candidates_token_count or 0, truncated)
+
+
+async def _with_retries(complete, *args):
+    """Await complete(*args), backing off and retrying on HTTP 429/5xx errors."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await complete(*args)
+        except Exception as e:
+            status = getattr(e, "status_code", None) or getattr(e, "code", None)
+            if not isinstance(status, int) or not _is_retryable(status) or attempt == MAX_RETRIES:
+                raise
+            headers = getattr(getattr(e, "response", None), "headers", None) or {}
+            delay = backoff_delay(attempt, headers.get("Retry-After"))
+            print(f"  [API HTTP {status}, retrying in {delay:.0f}s...]")
+            await asyncio.sleep(delay)
+
+
+def completion_key(model, system, user_msg):
+    """Content-addressed key for an LLM request."""
+    return hashlib.sha256(f"{model}|{system}|{user_msg}".encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def load_completion_cache():
+    """Load cached completions (key -> record) from LLM_CACHE_FILE."""
+    cache = {}
+    if LLM_CACHE_FILE.exists():
+        with open(LLM_CACHE_FILE, "rb") as f:
+            for line in f:
+                try:
+                    record = json_loads(line)
+                except ValueError:
+                    continue  # partial line from an interrupted run
+                cache[record["key"]] = record
+    return cache
+
+
+def save_completion(key, completion, input_tokens, output_tokens):
+    """Append a completion to LLM_CACHE_FILE and the in-memory cache."""
+    record = {
+        "key": key,
+        "completion": completion,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+    }
+    load_completion_cache()[key] = record
+    LLM_CACHE_FILE.parent.mkdir(exist_ok=True)
+    with open(LLM_CACHE_FILE, "ab") as f:
+        f.write(json_dumps(record) + b"\n")
+
+
+async def call_llm_async(prompt, hard=False, model=MODEL, rag=False, task_id=None,
+                         context7_cache=None, max_out=MAX_TOKENS, use_cache=False):
+    """Send a task prompt to the LLM and get the completion.
+
+    Starts with a max_out output cap; if the model stops on that cap, the call
+    is retried with a doubled cap (up to MAX_TOKENS). Token counts include
+    every attempt.
+
+    With use_cache, identical requests (same model, system prompt and user
+    message) are replayed from LLM_CACHE_FILE instead of hitting the API,
+    and fresh completions are added to it.
+
+    Returns (completion, input_tokens, output_tokens, rag_docs, cached).
+    """
     provider = detect_provider(model)
     system = SYSTEM_PROMPT_HARD if hard else SYSTEM_PROMPT
     docs = None
 
     if rag == "cheatsheet":
-        cheatsheet = load_cheatsheet()
-        if cheatsheet:
-            system += RAG_SUFFIX.format(cheatsheet=cheatsheet)
+        system += cheatsheet_system_suffix()
     elif rag == "context7":
         # Use cache if available, otherwise fetch live
         docs = None
         if context7_cache and task_id and task_id in context7_cache:
             docs = context7_cache[task_id]
         else:
-            docs = query_context7(prompt)
+            docs = await asyncio.to_thread(query_context7, prompt)
         if docs:
             system += RAG_SUFFIX.format(cheatsheet=docs)
 
@@ -238,68 +488,32 @@ def call_llm(prompt, hard=False, model=MODEL, rag=False, task_id=None, context7_
             f"(indented, no signature, no imports):\n\n```python\n{prompt}\n```"
         )
 
-    if provider == "anthropic":
-        api_key = os.environ.get("ANTHROPIC_API_KEY", "")
-        if api_key and anthropic is not None:
-            # Use SDK directly if API key available
-            client = anthropic.Anthropic(api_key=api_key)
-            response = client.messages.create(
-                model=model,
-                max_tokens=MAX_TOKENS,
-                system=system,
-                messages=[{"role": "user", "content": user_msg}],
-                temperature=0,
-            )
-            text = response.content[0].text
-            text = strip_markdown_fences(text)
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
-        else:
-            # Fall back to claude CLI (pipe via stdin to handle long prompts)
-            full_prompt = f"{system}\n\n{user_msg}"
-            result = subprocess.run(
-                ["claude", "-p", "-", "--model", model, "--output-format", "text"],
-                input=full_prompt,
-                capture_output=True,
-                text=True,
-                timeout=120,
-            )
-            if result.returncode != 0:
-                raise RuntimeError(f"claude CLI error: {result.stderr[:200]}")
-            text = result.stdout
-            if not text.strip():
-                raise RuntimeError(f"claude CLI returned empty output (stderr: {result.stderr[:200]})")
-            text = strip_markdown_fences(text)
-            input_tokens = len(full_prompt) // 4
-            output_tokens = len(text) // 4
-    else:
-        import signal
+    rag_docs = docs if rag == "context7" else None
+    key = completion_key(model, system, user_msg)
+    hit = load_completion_cache().get(key) if use_cache else None
+    if hit is not None:
+        return hit["completion"], hit["input_tokens"], hit["output_tokens"], rag_docs, True
 
-        def _timeout_handler(signum, frame):
-            raise TimeoutError("Gemini API call timed out after 120s")
+    complete = _complete_anthropic if provider == "anthropic" else _complete_gemini
+    complete = functools.partial(_with_retries, complete)
+    input_tokens = output_tokens = 0
+    while True:
+        text, in_tok, out_tok, truncated = await complete(model, system, user_msg, max_out)
+        input_tokens += in_tok
+        output_tokens += out_tok
+        if not truncated or max_out >= MAX_TOKENS:
+            break
+        max_out = min(max_out * 2, MAX_TOKENS)
+        print(f"  [hit output cap, retrying with max_out={max_out}]")
+
+    text = strip_markdown_fences(text)
+    if use_cache:
+        save_completion(key, text, input_tokens, output_tokens)
+    return text, input_tokens, output_tokens, rag_docs, False
 
-        client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
-        old_handler = signal.signal(signal.SIGALRM, _timeout_handler)
-        signal.alarm(120)
-        try:
-            response = client.models.generate_content(
-                model=model,
-                config=genai.types.GenerateContentConfig(
-                    system_instruction=system,
-                    max_output_tokens=MAX_TOKENS,
-                    temperature=0,
-                ),
-                contents=user_msg,
-            )
-        finally:
-            signal.alarm(0)
-            signal.signal(signal.SIGALRM, old_handler)
-        text = response.text
-        text = strip_markdown_fences(text)
-        input_tokens = response.usage_metadata.prompt_token_count or 0
-        output_tokens = response.usage_metadata.candidates_token_count or 0
 
-    return text, input_tokens, output_tokens, docs if rag == "context7" else None
+# A non-blank line whose first character isn't a space or tab
+_UNINDENTED_LINE_RE = re.compile(r"^(?!\s*$)[^ \t]", re.MULTILINE)
 
 
 def ensure_indented(code, indent="    "):
@@ -310,28 +524,36 @@ def ensure_indented(code, indent="    "):
     - Mixed (first line unindented, rest indented): indent the unindented lines
     - All lines already indented: leave as-is
     """
-    lines = code.split("\n")
-    non_empty = [l for l in lines if l.strip()]
-    if not non_empty:
+    # Common case (already-indented body): a single C-level scan finds no
+    # non-blank line starting without indentation, so skip the split entirely
+    if not _UNINDENTED_LINE_RE.search(code):
         return code
 
-    # Check if ALL non-empty lines already have indentation
-    all_indented = all(l.startswith((" ", "\t")) for l in non_empty)
-    if all_indented:
+    lines = code.split("\n")
+
+    # One pass: count non-blank lines and how many already have indentation
+    n_non_empty = n_indented = 0
+    for line in lines:
+        if line and not line.isspace():
+            n_non_empty += 1
+            if line[0] in " \t":
+                n_indented += 1
+
+    # No code, or ALL non-empty lines already have indentation
+    if n_indented == n_non_empty:
         return code
 
     # Check if MOST non-empty lines are indented (model gave body with 4-space
     # indent but first line lost its indent)
-    indented_count = sum(1 for l in non_empty if l.startswith((" ", "\t")))
-    if indented_count > len(non_empty) / 2:
+    if n_indented > n_non_empty / 2:
         # Only indent lines that aren't already indented
         return "\n".join(
-            indent + line if line.strip() and not line.startswith((" ", "\t")) else line
+            indent + line if line and line[0] not in " \t" and not line.isspace() else line
             for line in lines
         )
 
     # No lines indented: indent everything
-    return "\n".join(indent + line if line.strip() else line for line in lines)
+    return "\n".join(indent + line if line and not line.isspace() else line for line in lines)
 
 
 def build_test_script(task, completion, hard=False):
@@ -355,25 +577,250 @@ print("BENCHMARK_PASS")
 """
 
 
-def execute_test(script, timeout=EXECUTION_TIMEOUT):
-    """Run the test script in a subprocess. Returns (passed, output, error)."""
+def _preimport_test_modules():
+    """Import the heavy modules test scripts use, so each test doesn't pay for them."""
+    for name in ("numpy", "qiskit", "qiskit.quantum_info"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+class _CappedStringIO(io.StringIO):
+    """StringIO that silently drops writes past MAX_OUTPUT_BYTES characters."""
+
+    truncated = False
+
+    def write(self, s):
+        room = MAX_OUTPUT_BYTES - self.tell()
+        if len(s) > room:
+            self.truncated = True
+            s = s[:max(room, 0)]
+        super().write(s)
+        return len(s)
+
+    def getvalue(self):
+        value = super().getvalue()
+        return value + TRUNCATED_MARKER if self.truncated else value
+
+
+def _run_script_in_worker(script):
+    """Execute a test script in this process. Returns (stdout, stderr)."""
+    out, err = _CappedStringIO(), _CappedStringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            exec(compile(script, "<stdin>", "exec"), {"__name__": "__main__"})
+        except SystemExit:
+            pass
+        except BaseException as e:
+            # Skip this frame so the traceback matches a plain `python -` run
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    return out.getvalue(), err.getvalue()
+
+
+def _worker_main(conn):
+    _preimport_test_modules()
+    while True:
+        try:
+            script = conn.recv()
+        except EOFError:
+            return
+        conn.send(_run_script_in_worker(script))
+
+
+class WorkerPool:
+    """Warm Python processes (Qiskit pre-imported) that run test scripts.
+
+    Saves the interpreter start + Qiskit import on every task, at the cost of
+    tests sharing a process with earlier tests. A worker that times out or
+    dies is killed and replaced, so one bad completion can't wedge the pool.
+    """
+
+    def __init__(self, n_workers):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.idle = asyncio.Queue()
+        # recv() blocks, so each busy worker gets its own waiter thread
+        self.threads = ThreadPoolExecutor(max_workers=n_workers)
+        self.workers = []
+        for _ in range(n_workers):
+            self.idle.put_nowait(self._spawn())
+
+    def _spawn(self):
+        conn, child_conn = self.ctx.Pipe()
+        proc = self.ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        proc.start()
+        child_conn.close()
+        self.workers.append((proc, conn))
+        return proc, conn
+
+    async def _replace(self, worker, receiving=None):
+        """Kill worker and start a fresh one in its place.
+
+        receiving is the waiter thread's pending recv(), if any. The process
+        is killed first so that recv() hits EOF, and the connection is only
+        closed once that thread has let go of it.
+        """
+        proc, conn = worker
+        proc.kill()
+        if receiving is not None:
+            with contextlib.suppress(EOFError, OSError):
+                await receiving
+        proc.join()
+        conn.close()
+        self.workers.remove(worker)
+        self.idle.put_nowait(self._spawn())
+
+    async def run(self, script, timeout):
+        """Run script on an idle worker. Returns (stdout, stderr), or None on timeout."""
+        worker = await self.idle.get()
+        loop = asyncio.get_running_loop()
+        receiving = None
+        try:
+            worker[1].send(script)
+            receiving = loop.run_in_executor(self.threads, worker[1].recv)
+            # shield: on timeout, keep the future so _replace can wait for it
+            result = await asyncio.wait_for(asyncio.shield(receiving), timeout)
+        except asyncio.TimeoutError:
+            await self._replace(worker, receiving)
+            return None
+        except (EOFError, OSError):
+            await self._replace(worker)
+            return "", "Test worker process died"
+        self.idle.put_nowait(worker)
+        return result
+
+    def close(self):
+        for proc, conn in self.workers:
+            proc.kill()
+            proc.join()
+            conn.close()
+        self.threads.shutdown(wait=False)
+
+
+async def _read_capped(stream, limit):
+    """Read stream to EOF, keeping at most limit bytes. Returns (data, overflowed)."""
+    buf = bytearray()
+    while True:
+        chunk = await stream.read(64 * 1024)
+        if not chunk:
+            return bytes(buf), False
+        if len(buf) + len(chunk) > limit:
+            buf += chunk[:limit - len(buf)]
+            return bytes(buf), True
+        buf += chunk
+
+
+async def _communicate_capped(proc, data):
+    """Like proc.communicate(data), but with output bounded per stream.
+
+    A stream that exceeds MAX_OUTPUT_BYTES gets the child killed right away,
+    so a runaway print loop can't exhaust the harness's memory before the
+    timeout fires. Returns (stdout, stderr, truncated).
+    """
     try:
-        result = subprocess.run(
-            [sys.executable, "-c", script],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+        proc.stdin.write(data)
+        await proc.stdin.drain()
+        proc.stdin.close()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # child exited without reading its input; collect what it wrote
+
+    async def pump(stream):
+        out, overflowed = await _read_capped(stream, MAX_OUTPUT_BYTES)
+        if overflowed and proc.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+        return out, overflowed
+
+    (out, out_over), (err, err_over) = await asyncio.gather(pump(proc.stdout), pump(proc.stderr))
+    await proc.wait()
+    return out, err, out_over or err_over
+
+
+async def execute_test(script, timeout=EXECUTION_TIMEOUT, pool=None):
+    """Run the test script in a subprocess. Returns (passed, output, error).
+
+    With a WorkerPool the script runs in one of its warm workers instead of a
+    fresh interpreter. Scripts that don't compile are rejected in-process,
+    without paying for a Python subprocess + Qiskit import just to raise
+    SyntaxError.
+    """
+    try:
+        compile(script, "<benchmark>", "exec")
+    except (SyntaxError, ValueError) as e:
+        return False, "", f"{type(e).__name__}: {e}"
+
+    if pool is not None:
+        result = await pool.run(script, timeout)
+        if result is None:
+            return False, "", "TIMEOUT"
+        stdout, stderr = result
+        return "BENCHMARK_PASS" in stdout, stdout, stderr
+
+    try:
+        # Script goes in via stdin and the child gets TEST_ENV rather than
+        # the full parent environment; untrusted test code inherits no fds
+        # besides its three pipes.
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=TEST_ENV,
+            close_fds=True,
         )
-        passed = "BENCHMARK_PASS" in result.stdout
-        return passed, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return False, "", "TIMEOUT"
+        try:
+            out, err, truncated = await asyncio.wait_for(_communicate_capped(proc, script.encode()), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return False, "", "TIMEOUT"
+        stdout, stderr = out.decode(errors="replace"), err.decode(errors="replace")
+        if truncated:
+            # The child was killed mid-run, so it can't have passed
+            return False, stdout, stderr + TRUNCATED_MARKER
+        return "BENCHMARK_PASS" in stdout, stdout, stderr
     except Exception as e:
         return False, "", str(e)
 
 
+# Infrastructure errors: not the model's fault
+INFRA_PATTERNS = [
+    ("AccountNotFoundError", "IBM auth required"),
+    ("QiskitRuntimeService", "IBM auth required"),
+    ("active_account", "IBM auth required"),
+    ("IBMNotAuthorizedError", "IBM auth required"),
+    ("SamplerV2.__init__() got an unexpected keyword argument", "Qiskit API mismatch"),
+    ("SamplerV2.__init__() got unexpected keyword", "Qiskit API mismatch"),
+    ("EstimatorV2.__init__() got an unexpected keyword argument", "Qiskit API mismatch"),
+    ("No module named 'qiskit.providers.aer'", "Qiskit API mismatch"),
+    ("No module named 'qiskit.utils'", "Qiskit API mismatch"),
+    ("TIMEOUT", "Timeout"),
+]
+
+# Model errors: the LLM generated bad code
+MODEL_PATTERNS = [
+    ("AssertionError", "Wrong answer"),
+    ("AssertError", "Wrong answer"),
+    ("SyntaxError", "Syntax error"),
+    ("IndentationError", "Syntax error"),
+    ("ImportError", "Import error"),
+    ("ModuleNotFoundError", "Import error"),
+    ("AttributeError", "Attribute error"),
+    ("NameError", "Name error"),
+    ("TypeError", "Type error"),
+    ("ValueError", "Value error"),
+]
+
+# Each pattern once (first-seen order); zero-width lookahead so overlapping
+# occurrences are all reported
+_ERROR_RE = re.compile("(?=(" + "|".join(
+    re.escape(pattern)
+    for pattern in dict.fromkeys(pattern for pattern, _ in INFRA_PATTERNS + MODEL_PATTERNS)) + "))")
+
+
+@functools.lru_cache(maxsize=512)
 def classify_error(stderr):
-    """Classify error type from stderr.
+    """Classify error type from stderr (memoized; many failures share the same traceback).
 
     Returns (category, error_type) where category is one of:
       - 'model'          — the LLM produced wrong/broken code
@@ -382,46 +829,55 @@ def classify_error(stderr):
     if not stderr:
         return "infrastructure", "Unknown"
 
-    # Infrastructure errors: not the model's fault
-    infra_patterns = [
-        ("AccountNotFoundError", "IBM auth required"),
-        ("QiskitRuntimeService", "IBM auth required"),
-        ("active_account", "IBM auth required"),
-        ("IBMNotAuthorizedError", "IBM auth required"),
-        ("SamplerV2.__init__() got an unexpected keyword argument", "Qiskit API mismatch"),
-        ("SamplerV2.__init__() got unexpected keyword", "Qiskit API mismatch"),
-        ("EstimatorV2.__init__() got an unexpected keyword argument", "Qiskit API mismatch"),
-        ("No module named 'qiskit.providers.aer'", "Qiskit API mismatch"),
-        ("No module named 'qiskit.utils'", "Qiskit API mismatch"),
-        ("TIMEOUT", "Timeout"),
-    ]
-    for pattern, label in infra_patterns:
-        if pattern in stderr:
+    # One regex pass collects every known pattern present; the first one in
+    # priority order (infra before model) decides the classification.
+    found = set(_ERROR_RE.findall(stderr))
+    for pattern, label in INFRA_PATTERNS:
+        if pattern in found:
             return "infrastructure", label
-
-    # Model errors: the LLM generated bad code
-    model_patterns = [
-        ("AssertionError", "Wrong answer"),
-        ("AssertError", "Wrong answer"),
-        ("AssertionError", "Wrong answer"),
-        ("SyntaxError", "Syntax error"),
-        ("IndentationError", "Syntax error"),
-        ("ImportError", "Import error"),
-        ("ModuleNotFoundError", "Import error"),
-        ("AttributeError", "Attribute error"),
-        ("NameError", "Name error"),
-        ("TypeError", "Type error"),
-        ("ValueError", "Value error"),
-    ]
-    for pattern, label in model_patterns:
-        if pattern in stderr:
+    for pattern, label in MODEL_PATTERNS:
+        if pattern in found:
             return "model", label
     return "model", "Runtime error"
 
 
+def available_cpus():
+    """Number of CPUs this process may run on (its affinity mask, where supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def limit_cpu_affinity(max_cpus=16, threshold=32):
+    """Pin the harness to a few cores on large many-core hosts (--limit-affinity).
+
+    Process spawn cost grows sharply with core count on big Linux boxes; child
+    processes inherit the affinity, so every test subprocess stays cheap.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) > threshold:
+        os.sched_setaffinity(0, set(cpus[:max_cpus]))
+        print(f"  [CPU affinity limited to {max_cpus} of {len(cpus)} cores]")
+
+
 def run_benchmark(args):
-    """Main benchmark loop."""
+    """Run the benchmark; see run_benchmark_async."""
+    return asyncio.run(run_benchmark_async(args))
+
+
+async def run_benchmark_async(args):
+    """Main benchmark loop.
+
+    Up to args.concurrency LLM calls and args.test_concurrency test runs are
+    in flight at once. The two are limited separately, so a task releases its
+    LLM slot before running its test and the next completion is requested
+    while the test executes.
+    """
     RESULTS_DIR.mkdir(exist_ok=True)
+    if getattr(args, "limit_affinity", False):
+        limit_cpu_affinity()
 
     tasks = load_dataset(hard=args.hard)
     model = args.model or MODEL
@@ -448,15 +904,29 @@ def run_benchmark(args):
     results_file = RESULTS_DIR / f"results_{variant}_{model_slug}_{timestamp}.json"
     checkpoint_file = RESULTS_DIR / f"checkpoint_{variant}_{model_slug}.json"
 
-    # Load checkpoint if resuming
+    checkpoint_log = checkpoint_file.with_suffix(".jsonl")
+
+    # Load checkpoint if resuming (the per-task log is the most up to date)
     completed = {}
-    if args.resume and checkpoint_file.exists():
-        with open(checkpoint_file) as f:
-            completed = {r["task_id"]: r for r in json.load(f)}
-        print(f"Resuming: {len(completed)} tasks already completed")
+    if args.resume and checkpoint_log.exists():
+        with open(checkpoint_log, "rb") as f:
+            for line in f:
+                try:
+                    r = json_loads(line)
+                except ValueError:
+                    continue  # partial line from an interrupted run
+                completed[r["task_id"]] = r
+    elif args.resume and checkpoint_file.exists():
+        completed = {r["task_id"]: r for r in json_loads(checkpoint_file.read_bytes())}
+    if args.resume:
+        # Tasks whose LLM call failed are run again
+        n_api_errors = sum(1 for r in completed.values() if r.get("api_error"))
+        completed = {task_id: r for task_id, r in completed.items() if not r.get("api_error")}
+        print(f"Resuming: {len(completed)} tasks already completed, {n_api_errors} API errors to retry")
 
     results = list(completed.values())
     total = len(tasks)
+    pending = [t for t in tasks if t["task_id"] not in completed]
     passed_count = sum(1 for r in results if r["passed"])
 
     print(f"\nQiskit HumanEval Benchmark")
@@ -464,58 +934,72 @@ def run_benchmark(args):
     print(f"  Model:      {model}")
     print(f"  Tasks:      {total}")
     print(f"  Timeout:    {EXECUTION_TIMEOUT}s per task")
+    concurrency = getattr(args, "concurrency", 8)
+    test_concurrency = getattr(args, "test_concurrency", None) or min(concurrency, available_cpus())
+    print(f"  Concurrency: {concurrency} LLM calls, {test_concurrency} tests")
+    if getattr(args, "workers", 0):
+        print(f"  Workers:    {args.workers} (warm test processes)")
     print(f"  Results:    {results_file}")
     print("=" * 60)
 
-    for i, task in enumerate(tasks):
-        task_id = task["task_id"]
-
-        if task_id in completed:
-            continue
+    llm_slots = asyncio.Semaphore(concurrency)
+    test_slots = asyncio.Semaphore(test_concurrency)
+    workers = getattr(args, "workers", 0)
+    pool = WorkerPool(workers) if workers else None
 
+    async def process_task(i, task):
+        """Run one task (LLM call + test) and return its result record."""
+        task_id = task["task_id"]
         difficulty = task["difficulty_scale"]
         entry = task["entry_point"]
-        print(f"\n[{i+1}/{total}] {task_id} ({difficulty}) -- {entry}")
+        # Output is collected per task and printed in one block, so lines
+        # from concurrently running tasks don't interleave.
+        log = [f"\n[{i+1}/{total}] {task_id} ({difficulty}) -- {entry}"]
 
         # Call LLM
-        t0 = time.time()
-        try:
-            completion, input_tokens, output_tokens, rag_docs = call_llm(
-                task["prompt"], hard=args.hard, model=model, rag=rag,
-                task_id=task_id, context7_cache=context7_cache
-            )
-        except Exception as e:
-            print(f"  API ERROR: {e}")
-            results.append({
-                "task_id": task_id,
-                "difficulty": difficulty,
-                "entry_point": entry,
-                "passed": False,
-                "error": f"API error: {e}",
-                "completion": "",
-                "api_time": 0,
-                "exec_time": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-            })
-            continue
-
-        api_time = time.time() - t0
-
-        # Build and execute test
+        async with llm_slots:
+            t0 = time.time()
+            try:
+                completion, input_tokens, output_tokens, rag_docs, cached = await call_llm_async(
+                    task["prompt"], hard=args.hard, model=model, rag=rag,
+                    task_id=task_id, context7_cache=context7_cache,
+                    max_out=MAX_TOKENS_BY_DIFFICULTY.get(difficulty, MAX_TOKENS),
+                    use_cache=getattr(args, "cache", False),
+                )
+            except Exception as e:
+                log.append(f"  API ERROR: {e}")
+                print("\n".join(log))
+                return {
+                    "task_id": task_id,
+                    "difficulty": difficulty,
+                    "entry_point": entry,
+                    "passed": False,
+                    "error": f"API error: {e}",
+                    "api_error": True,
+                    "completion": "",
+                    "api_time": 0,
+                    "exec_time": 0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                }
+            api_time = time.time() - t0
+
+        # Build and execute test (the LLM slot is already free for the next task)
         script = build_test_script(task, completion, hard=args.hard)
-        t1 = time.time()
-        passed, stdout, stderr = execute_test(script)
-        exec_time = time.time() - t1
+        async with test_slots:
+            t1 = time.time()
+            passed, stdout, stderr = await execute_test(script, timeout=EXECUTION_TIMEOUT, pool=pool)
+            exec_time = time.time() - t1
 
         status = "PASS" if passed else "FAIL"
-        print(f"  {status}  (API: {api_time:.1f}s, Exec: {exec_time:.1f}s, "
-              f"Tokens: {input_tokens}+{output_tokens})")
+        log.append(f"  {status}  (API: {api_time:.1f}s{' cached' if cached else ''}, Exec: {exec_time:.1f}s, "
+                   f"Tokens: {input_tokens}+{output_tokens})")
 
         if not passed and stderr:
             err_lines = stderr.strip().split("\n")
             for line in err_lines[-3:]:
-                print(f"  | {line[:120]}")
+                log.append(f"  | {line[:120]}")
+        print("\n".join(log))
 
         result = {
             "task_id": task_id,
@@ -532,19 +1016,51 @@ def run_benchmark(args):
         }
         if rag_docs:
             result["rag_docs"] = rag_docs[:3000]
+        if cached:
+            result["cached"] = True
+        return result
+
+    async def run_and_record(i, task):
+        nonlocal passed_count
+        result = await process_task(i, task)
+        # No await between here and the end of the checkpoint write, so
+        # concurrent tasks can't interleave their updates.
         results.append(result)
-
-        if passed:
+        if result["passed"]:
             passed_count += 1
 
-        # Checkpoint after every task
-        with open(checkpoint_file, "w") as f:
-            json.dump(results, f, indent=2)
+        # Checkpoint after every task, API errors included (flagged with
+        # api_error, so --resume retries them): append one line to the log,
+        # plus a full JSON snapshot every CHECKPOINT_SNAPSHOT_EVERY tasks
+        log_file.write(json_dumps(result) + b"\n")
+        log_file.flush()
+        os.fsync(log_file.fileno())
+        if len(results) % CHECKPOINT_SNAPSHOT_EVERY == 0:
+            tmp = checkpoint_file.with_suffix(".tmp")
+            write_json(tmp, results, indent=True)
+            os.replace(tmp, checkpoint_file)
 
         # Running stats
         done = len(results)
         print(f"  Running: {passed_count}/{done} = {passed_count/done*100:.1f}%")
 
+    # Start the log from what's already done, then append as tasks finish
+    log_file = open(checkpoint_log, "wb")
+    for r in results:
+        log_file.write(json_dumps(r) + b"\n")
+    try:
+        await asyncio.gather(*(
+            run_and_record(i, task) for i, task in enumerate(pending, start=len(completed))
+        ))
+    finally:
+        log_file.close()
+        if pool is not None:
+            pool.close()
+
+    # Keep results in dataset order regardless of completion order
+    order = {t["task_id"]: i for i, t in enumerate(tasks)}
+    results.sort(key=lambda r: order.get(r["task_id"], len(order)))
+
     # --- Final results ---
     print("\n" + "=" * 60)
     print("FINAL RESULTS")
@@ -558,6 +1074,10 @@ def run_benchmark(args):
     print(f"  Model:  {model}")
     print(f"  Pass@1: {total_pass}/{total_done} = {total_pass/total_done*100:.1f}%")
     print(f"  Total tokens: {total_input_tokens:,} input + {total_output_tokens:,} output")
+    total_cached = sum(1 for r in results if r.get("cached"))
+    if total_cached:
+        print(f"  Replayed from cache: {total_cached}/{total_done} completions "
+              f"(their tokens are included above but were not billed this run)")
 
     for diff in ["basic", "intermediate", "difficult"]:
         subset = [r for r in results if r["difficulty"] == diff]
@@ -569,6 +1089,11 @@ def run_benchmark(args):
     failures = [r for r in results if not r["passed"]]
     if failures:
         classified = [(classify_error(r.get("stderr", "")), r) for r in failures]
+        # Record the classification on each result so consumers of the saved
+        # JSON don't have to re-parse stderr
+        for (cat, etype), r in classified:
+            r["error_category"] = cat
+            r["error_type"] = etype
         infra_failures = [(cat, etype, r) for (cat, etype), r in classified if cat == "infrastructure"]
         model_failures = [(cat, etype, r) for (cat, etype), r in classified if cat == "model"]
 
@@ -594,12 +1119,11 @@ def run_benchmark(args):
             tag = "[INFRA]" if cat == "infrastructure" else "[MODEL]"
             print(f"    {tag} {r['task_id']} ({r['difficulty']}): {etype}")
 
-    # Compute infra vs model split for saved results
+    # Infra vs model split for saved results (reuses the breakdown above)
     if failures:
-        _classified = [(classify_error(r.get("stderr", "")), r) for r in failures]
-        _infra = sum(1 for (cat, _), _ in _classified if cat == "infrastructure")
-        _testable = total_done - _infra
-        _adjusted = round(total_pass / _testable * 100, 2) if _testable else 0
+        _infra = infra_count
+        _testable = testable
+        _adjusted = adjusted_rate
     else:
         _infra = 0
         _testable = total_done
@@ -619,6 +1143,7 @@ def run_benchmark(args):
         "adjusted_pass_rate": _adjusted,
         "total_input_tokens": total_input_tokens,
         "total_output_tokens": total_output_tokens,
+        "cached_completions": total_cached,
         "by_difficulty": {},
         "results": results,
     }
@@ -632,13 +1157,13 @@ def run_benchmark(args):
                 "pass_rate": round(p / len(subset) * 100, 2),
             }
 
-    with open(results_file, "w") as f:
-        json.dump(summary, f, indent=2)
+    write_json(results_file, summary, indent=True)
 
     print(f"\n  Results saved to {results_file}")
 
-    if checkpoint_file.exists():
-        checkpoint_file.unlink()
+    for path in (checkpoint_file, checkpoint_log):
+        if path.exists():
+            path.unlink()
 
     return summary
 
@@ -652,6 +1177,17 @@ if __name__ == "__main__":
     parser.add_argument("--resume", action="store_true", help="Resume from checkpoint")
     parser.add_argument("--task-id", type=int, help="Run a single task by index")
     parser.add_argument("--timeout", type=int, default=60, help="Exec timeout (seconds)")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM calls run concurrently")
+    parser.add_argument("--test-concurrency", type=int, default=None,
+                        help="Tests run concurrently (default: min(--concurrency, usable CPUs))")
+    parser.add_argument("--limit-affinity", action="store_true",
+                        help="On hosts with more than 32 cores, pin the harness and its tests "
+                             "to the first 16 (cheaper process spawns)")
+    parser.add_argument("--cache", action="store_true",
+                        help=f"Replay identical requests from {LLM_CACHE_FILE} and record new ones")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Run tests in N warm worker processes with Qiskit pre-imported "
+                             "(default: fresh subprocess per test)")
     parser.add_argument("--rag", choices=["cheatsheet", "context7"], default=None,
                         help="RAG mode: 'cheatsheet' (static file) or 'context7' (dynamic per-task docs)")
     parser.add_argument("--build-cache", action="store_true",
@@ -8,14 +8,28 @@ Compare output against: npx vitest run lib/quantum.test.ts
 This provides an independent ground truth from a trusted quantum library.
 """
 
+import functools
 import json
 import numpy as np
 from qiskit import QuantumCircuit
+from qiskit.circuit.library import XGate, ZGate
 from qiskit.quantum_info import Statevector, DensityMatrix, partial_trace, entropy, concurrence
 
 def sv_to_list(sv):
-    """Convert Qiskit Statevector to [[re, im], ...] matching our TS format."""
-    return [[float(c.real), float(c.imag)] for c in sv.data]
+    """Convert Qiskit Statevector (or amplitude array) to [[re, im], ...] matching our TS format."""
+    data = np.asarray(getattr(sv, 'data', sv))
+    arr = np.empty((data.size, 2), dtype=np.float64)
+    arr[:, 0] = data.real
+    arr[:, 1] = data.imag
+    return arr.tolist()
+
+@functools.lru_cache(maxsize=None)
+def _sv(num_qubits, *ops):
+    """Simulate a circuit given as hashable ops like ('h', 0), ('cx', 0, 1); memoized."""
+    qc = QuantumCircuit(num_qubits)
+    for name, *qargs in ops:
+        getattr(qc, name)(*qargs)
+    return Statevector.from_instruction(qc)
 
 def run_all():
     results = {}
@@ -23,78 +37,62 @@ def run_all():
     # --- Single-qubit gates on |0⟩ ---
 
     # H|0⟩
-    qc = QuantumCircuit(1); qc.h(0)
-    results['H|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['H|0>'] = sv_to_list(_sv(1, ('h', 0)))
 
     # X|0⟩
-    qc = QuantumCircuit(1); qc.x(0)
-    results['X|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['X|0>'] = sv_to_list(_sv(1, ('x', 0)))
 
     # Y|0⟩
-    qc = QuantumCircuit(1); qc.y(0)
-    results['Y|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Y|0>'] = sv_to_list(_sv(1, ('y', 0)))
 
     # Z|0⟩
-    qc = QuantumCircuit(1); qc.z(0)
-    results['Z|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Z|0>'] = sv_to_list(_sv(1, ('z', 0)))
 
     # H|1⟩ = |->
-    qc = QuantumCircuit(1); qc.x(0); qc.h(0)
-    results['H|1>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['H|1>'] = sv_to_list(_sv(1, ('x', 0), ('h', 0)))
 
     # S|1⟩
-    qc = QuantumCircuit(1); qc.x(0); qc.s(0)
-    results['S|1>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['S|1>'] = sv_to_list(_sv(1, ('x', 0), ('s', 0)))
 
     # T|1⟩
-    qc = QuantumCircuit(1); qc.x(0); qc.t(0)
-    results['T|1>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['T|1>'] = sv_to_list(_sv(1, ('x', 0), ('t', 0)))
 
     # Rx(π)|0⟩
-    qc = QuantumCircuit(1); qc.rx(np.pi, 0)
-    results['Rx(pi)|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Rx(pi)|0>'] = sv_to_list(_sv(1, ('rx', np.pi, 0)))
 
     # Ry(π)|0⟩
-    qc = QuantumCircuit(1); qc.ry(np.pi, 0)
-    results['Ry(pi)|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Ry(pi)|0>'] = sv_to_list(_sv(1, ('ry', np.pi, 0)))
 
     # Rz(π)|0⟩
-    qc = QuantumCircuit(1); qc.rz(np.pi, 0)
-    results['Rz(pi)|0>'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Rz(pi)|0>'] = sv_to_list(_sv(1, ('rz', np.pi, 0)))
 
     # --- Bell states ---
-    # Phi+ = (|00⟩ + |11⟩)/√2
-    qc = QuantumCircuit(2); qc.h(0); qc.cx(0, 1)
-    sv_bell = Statevector.from_instruction(qc)
+    # Phi+ = (|00⟩ + |11⟩)/√2 — simulated once, the other three derived from it
+    sv_bell = _sv(2, ('h', 0), ('cx', 0, 1))
     results['Bell_Phi+'] = sv_to_list(sv_bell)
 
     # Phi- = (|00⟩ - |11⟩)/√2
-    qc = QuantumCircuit(2); qc.h(0); qc.cx(0, 1); qc.z(0)
-    results['Bell_Phi-'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Bell_Phi-'] = sv_to_list(sv_bell.evolve(ZGate(), [0]))
 
     # Psi+ = (|01⟩ + |10⟩)/√2
-    qc = QuantumCircuit(2); qc.h(0); qc.cx(0, 1); qc.x(0)
-    results['Bell_Psi+'] = sv_to_list(Statevector.from_instruction(qc))
+    sv_psi_plus = sv_bell.evolve(XGate(), [0])
+    results['Bell_Psi+'] = sv_to_list(sv_psi_plus)
 
     # Psi- = (|01⟩ - |10⟩)/√2
-    qc = QuantumCircuit(2); qc.h(0); qc.cx(0, 1); qc.x(0); qc.z(0)
-    results['Bell_Psi-'] = sv_to_list(Statevector.from_instruction(qc))
+    results['Bell_Psi-'] = sv_to_list(sv_psi_plus.evolve(ZGate(), [0]))
 
     # Bell state entanglement metrics
-    qc = QuantumCircuit(2); qc.h(0); qc.cx(0, 1)
-    rho = DensityMatrix(Statevector.from_instruction(qc))
+    rho = DensityMatrix(sv_bell)
     rho_a = partial_trace(rho, [1])  # trace out qubit 1
     results['Bell_Phi+_entropy'] = float(entropy(rho_a, base=2))
     results['Bell_Phi+_concurrence'] = float(concurrence(rho))
 
     # --- GHZ states ---
     # 3-qubit: (|000⟩ + |111⟩)/√2
-    qc = QuantumCircuit(3); qc.h(0); qc.cx(0, 1); qc.cx(0, 2)
-    results['GHZ_3'] = sv_to_list(Statevector.from_instruction(qc))
+    results['GHZ_3'] = sv_to_list(_sv(3, ('h', 0), ('cx', 0, 1), ('cx', 0, 2)))
 
     # 4-qubit
-    qc = QuantumCircuit(4); qc.h(0); qc.cx(0, 1); qc.cx(0, 2); qc.cx(0, 3)
-    results['GHZ_4'] = sv_to_list(Statevector.from_instruction(qc))
+    results['GHZ_4'] = sv_to_list(_sv(4, ('h', 0), ('cx', 0, 1), ('cx', 0, 2), ('cx', 0, 3)))
 
     # --- W state (manually constructed) ---
     # |W⟩ = (|001⟩ + |010⟩ + |100⟩)/√3
@@ -103,7 +101,7 @@ def run_all():
     w_vec[1] = amp  # |001⟩
     w_vec[2] = amp  # |010⟩
     w_vec[4] = amp  # |100⟩
-    results['W_3'] = [[float(c.real), float(c.imag)] for c in w_vec]
+    results['W_3'] = sv_to_list(w_vec)
 
     # --- Bloch sphere coordinates ---
     # |0⟩ → (0, 0, 1)
@@ -118,8 +116,7 @@ def run_all():
     }
 
     # --- Product state entanglement = 0 ---
-    qc = QuantumCircuit(2)  # |00⟩
-    rho = DensityMatrix(Statevector.from_instruction(qc))
+    rho = DensityMatrix(_sv(2))  # |00⟩
     results['|00>_concurrence'] = float(concurrence(rho))
     rho_a = partial_trace(rho, [1])
     results['|00>_entropy'] = float(entropy(rho_a, base=2))
@@ -139,10 +136,7 @@ def run_all():
     all_pass = True
     for name, expected in checks:
         actual = results[name]
-        match = all(
-            abs(a[0] - e[0]) < 1e-10 and abs(a[1] - e[1]) < 1e-10
-            for a, e in zip(actual, expected)
-        )
+        match = np.allclose(actual, expected, rtol=0, atol=1e-10)
         status = "PASS" if match else "FAIL"
         if not match:
             all_pass = False
@@ -20,7 +20,6 @@ import argparse
 import numpy as np
 from datetime import datetime, timezone
 from pathlib import Path
-from collections import Counter
 
 # ============================================================
 # Constants
@@ -111,17 +110,20 @@ def compute_energy(z_counts, x_counts, y_counts,
     return energy, evs
 
 
-def counts_to_bitstrings(counts):
-    """Expand count dict to list of bitstrings for bootstrap resampling."""
-    bitstrings = []
-    for bs, count in counts.items():
-        bitstrings.extend([bs] * count)
-    return bitstrings
+def counts_to_labels(counts):
+    """Expand a count dict to one integer label per shot for bootstrap resampling.
+
+    Returns the bitstrings (label -> bitstring) and the per-shot label array.
+    """
+    bitstrings = list(counts)
+    labels = np.repeat(np.arange(len(bitstrings)), [counts[bs] for bs in bitstrings])
+    return bitstrings, labels
 
 
-def bitstrings_to_counts(bitstrings):
-    """Convert list of bitstrings back to count dict."""
-    return dict(Counter(bitstrings))
+def labels_to_counts(bitstrings, labels):
+    """Convert resampled shot labels back to a count dict."""
+    tally = np.bincount(labels, minlength=len(bitstrings))
+    return {bs: int(n) for bs, n in zip(bitstrings, tally) if n}
 
 
 def bootstrap_energy(z_counts, x_counts, y_counts,
@@ -133,19 +135,19 @@ def bootstrap_energy(z_counts, x_counts, y_counts,
     if rng is None:
         rng = np.random.default_rng(42)
 
-    z_bs = np.array(counts_to_bitstrings(z_counts))
-    x_bs = np.array(counts_to_bitstrings(x_counts))
-    y_bs = np.array(counts_to_bitstrings(y_counts))
+    z_bs, z_labels = counts_to_labels(z_counts)
+    x_bs, x_labels = counts_to_labels(x_counts)
+    y_bs, y_labels = counts_to_labels(y_counts)
 
     energies = []
     for _ in range(n_resamples):
-        z_idx = rng.integers(0, len(z_bs), size=len(z_bs))
-        x_idx = rng.integers(0, len(x_bs), size=len(x_bs))
-        y_idx = rng.integers(0, len(y_bs), size=len(y_bs))
+        z_idx = rng.integers(0, len(z_labels), size=len(z_labels))
+        x_idx = rng.integers(0, len(x_labels), size=len(x_labels))
+        y_idx = rng.integers(0, len(y_labels), size=len(y_labels))
 
-        z_c = bitstrings_to_counts(z_bs[z_idx])
-        x_c = bitstrings_to_counts(x_bs[x_idx])
-        y_c = bitstrings_to_counts(y_bs[y_idx])
+        z_c = labels_to_counts(z_bs, z_labels[z_idx])
+        x_c = labels_to_counts(x_bs, x_labels[x_idx])
+        y_c = labels_to_counts(y_bs, y_labels[y_idx])
 
         if postselect:
             z_c = parity_postselect(z_c)
@@ -0,0 +1,212 @@
+"""Golden-output tests for the vectorized experiments/analyze_* scripts.
+
+Each vectorized routine is checked against the per-key loop it replaced:
+1. analyze_h2_5reps.counts_to_p4 vs the 2-qubit marginal loop
+2. analyze_qv16_hardware.histogram_distribution / compute_hof vs the per-key
+   heavy-output loop, including integer keys outside the 16 logical outcomes
+3. analyze_rb_tuna9.compute_all_survivals vs the per-qubit survival loop
+4. analyze_rb_tuna9.fit_rb vs curve_fit from the original [0.5, 0.99, 0.5] start
+"""
+import sys
+import numpy as np
+import pytest
+from scipy.optimize import curve_fit
+
+sys.path.insert(0, str(__import__("pathlib").Path(__file__).parent.parent / "experiments"))
+import analyze_h2_5reps
+import analyze_qv16_hardware as qv
+import analyze_rb_tuna9 as rb
+
+
+def random_counts(rng, n_keys, width):
+    keys = {"".join(rng.choice(["0", "1"], size=width)) for _ in range(n_keys)}
+    return {k: int(rng.integers(1, 100)) for k in keys}
+
+
+# ─── Reference implementations (the loops the scripts used to run) ──────────
+
+def ref_extract_2q_probs(counts, pos0, pos1):
+    total = sum(counts.values())
+    probs = np.zeros(4)
+    for bitstring, count in counts.items():
+        probs[int(bitstring[pos0]) * 2 + int(bitstring[pos1])] += count
+    return probs / total
+
+
+def ref_hardware_bs_to_logical(bitstring):
+    logical_bits = ["0"] * 4
+    for phys_idx, log_idx in {4: 0, 6: 1, 7: 2, 8: 3}.items():
+        logical_bits[3 - log_idx] = bitstring[8 - phys_idx]
+    return "".join(logical_bits)
+
+
+def ref_compute_hof(counts, heavy_set):
+    total = 0
+    heavy_count = 0
+    for bitstring, count in counts.items():
+        if len(bitstring) == 9:
+            logical_bs = ref_hardware_bs_to_logical(bitstring)
+        elif len(bitstring) == 4:
+            logical_bs = bitstring
+        else:
+            logical_bs = format(int(bitstring), "04b")
+        total += count
+        if logical_bs in heavy_set:
+            heavy_count += count
+    return heavy_count / total if total > 0 else 0.0
+
+
+def ref_compute_survival(counts, qubit, n_total=9):
+    total = 0
+    n_zero = 0
+    for bs, count in counts.items():
+        bs_pos = n_total - 1 - qubit
+        bit_val = bs[bs_pos] if bs_pos < len(bs) else "0"
+        if bit_val == "0":
+            n_zero += count
+        total += count
+    return n_zero / total if total > 0 else 0.0
+
+
+# ─── H2 REM Tests ───────────────────────────────────────────────────────────
+
+class TestCountsToP4:
+    """counts_to_p4 reproduces the per-key 2-qubit marginal."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_reference(self, seed):
+        counts = random_counts(np.random.default_rng(seed), 150, 9)
+        probs, n_shots = analyze_h2_5reps.counts_to_p4(counts)
+        expected = ref_extract_2q_probs(counts, analyze_h2_5reps.Q0_POS, analyze_h2_5reps.Q1_POS)
+        np.testing.assert_allclose(probs, expected, rtol=1e-12)
+        assert n_shots == sum(counts.values())
+
+    def test_other_positions(self):
+        counts = random_counts(np.random.default_rng(7), 150, 9)
+        probs, _ = analyze_h2_5reps.counts_to_p4(counts, 0, 8)
+        np.testing.assert_allclose(probs, ref_extract_2q_probs(counts, 0, 8), rtol=1e-12)
+
+
+# ─── Quantum Volume Tests ───────────────────────────────────────────────────
+
+def random_heavy_set(rng):
+    return {format(i, "04b") for i in rng.choice(16, size=8, replace=False)}
+
+
+class TestHeavyOutputFraction:
+    """compute_hof matches the per-key heavy-output loop for every key format."""
+
+    @pytest.mark.parametrize("width", [9, 4])
+    def test_bitstring_keys(self, width):
+        rng = np.random.default_rng(width)
+        for _ in range(20):
+            counts = random_counts(rng, 60, width)
+            heavy = random_heavy_set(rng)
+            assert qv.compute_hof(counts, qv.heavy_bitmask(heavy)) == pytest.approx(
+                ref_compute_hof(counts, heavy), rel=1e-12)
+
+    def test_integer_keys_including_out_of_range(self):
+        rng = np.random.default_rng(11)
+        keys = [str(k) for k in range(-4, 600)]
+        for _ in range(20):
+            chosen = rng.choice(keys, size=40, replace=False)
+            counts = {k: int(rng.integers(1, 100)) for k in chosen}
+            heavy = random_heavy_set(rng)
+            assert qv.compute_hof(counts, qv.heavy_bitmask(heavy)) == pytest.approx(
+                ref_compute_hof(counts, heavy), rel=1e-12)
+
+    def test_mixed_width_keys(self):
+        counts = {"0000": 5, "17": 3}
+        heavy = {"0000", "0001"}
+        assert qv.compute_hof(counts, qv.heavy_bitmask(heavy)) == pytest.approx(
+            ref_compute_hof(counts, heavy))
+
+    def test_decoded_arrays_match_dict(self):
+        counts = random_counts(np.random.default_rng(3), 60, 9)
+        mask = qv.heavy_bitmask(random_heavy_set(np.random.default_rng(4)))
+        assert qv.compute_hof(qv.decode_counts(counts), mask) == qv.compute_hof(counts, mask)
+
+    def test_out_of_range_outcomes_count_toward_total_only(self):
+        p = qv.histogram_distribution({"3": 30, "42": 10, "-1": 10})
+        assert p.shape == (16,)
+        assert p[3] == pytest.approx(0.6)
+        assert p.sum() == pytest.approx(0.6)
+
+    def test_empty_counts(self):
+        assert qv.compute_hof({}, 0xFFFF) == 0.0
+
+
+# ─── Randomized Benchmarking Tests ──────────────────────────────────────────
+
+class TestSurvivals:
+    """compute_all_survivals matches the per-qubit survival loop."""
+
+    def test_nine_bit_keys(self):
+        counts = random_counts(np.random.default_rng(5), 200, 9)
+        expected = [ref_compute_survival(counts, q) for q in range(9)]
+        np.testing.assert_allclose(rb.compute_all_survivals(counts), expected, rtol=1e-12)
+
+    def test_short_keys_read_missing_qubits_as_zero(self):
+        counts = random_counts(np.random.default_rng(6), 20, 5)
+        counts.update(random_counts(np.random.default_rng(7), 20, 9))
+        expected = [ref_compute_survival(counts, q) for q in range(9)]
+        np.testing.assert_allclose(rb.compute_all_survivals(counts), expected, rtol=1e-12)
+
+
+def synthetic_decay(seed, A=0.45, p=0.985, B=0.5, noise=0.01):
+    rng = np.random.default_rng(seed)
+    ms = np.array([1, 4, 8, 16, 32, 64, 128, 256], dtype=float)
+    means = rb.rb_model(ms, A, p, B) + rng.normal(0, noise, len(ms))
+    stds = np.full(len(ms), noise)
+    return ms, means, stds
+
+
+def reference_fit(ms, means):
+    popt, pcov = curve_fit(rb.rb_model, ms, means, p0=[0.5, 0.99, 0.5],
+                           bounds=([0, 0, 0], [1, 1, 1]), maxfev=10000)
+    return popt, np.sqrt(np.diag(pcov))
+
+
+def cost(popt, ms, means):
+    return 0.5 * np.sum((rb.rb_model(ms, *popt) - means) ** 2)
+
+
+class TestFitRB:
+    """fit_rb agrees with the original curve_fit and never fits worse."""
+
+    @pytest.fixture(autouse=True)
+    def fit_cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(rb, "FIT_CACHE_DIR", tmp_path / "rb_fit_cache")
+        return tmp_path / "rb_fit_cache"
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_curve_fit(self, seed):
+        ms, means, stds = synthetic_decay(seed)
+        popt, perr = rb.fit_rb(ms, means, stds)
+        ref_popt, ref_perr = reference_fit(ms, means)
+        np.testing.assert_allclose(popt, ref_popt, rtol=1e-4, atol=1e-6)
+        np.testing.assert_allclose(perr, ref_perr, rtol=1e-2)
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_cost_never_above_curve_fit(self, seed):
+        # Noisier, flatter decays, where the bounded fit can have several minima
+        ms, means, stds = synthetic_decay(seed, A=0.2, p=0.995, B=0.75, noise=0.03)
+        means = np.clip(means, 0, 1)
+        popt, _ = rb.fit_rb(ms, means, stds)
+        ref_popt, _ = reference_fit(ms, means)
+        assert cost(popt, ms, means) <= cost(ref_popt, ms, means) * (1 + 1e-6)
+
+    def test_cached_fit_is_reused(self, fit_cache_dir):
+        ms, means, stds = synthetic_decay(0)
+        popt, perr = rb.fit_rb(ms, means, stds)
+        (path,) = fit_cache_dir.iterdir()
+        path.write_text('{"popt": [0.1, 0.2, 0.3], "perr": [0.0, 0.0, 0.0]}')
+        cached_popt, _ = rb.fit_rb(ms, means, stds)
+        np.testing.assert_array_equal(cached_popt, [0.1, 0.2, 0.3])
+
+    def test_cache_key_includes_fit_version(self, fit_cache_dir, monkeypatch):
+        ms, means, stds = synthetic_decay(0)
+        rb.fit_rb(ms, means, stds)
+        monkeypatch.setattr(rb, "FIT_CACHE_VERSION", b"other-fit")
+        rb.fit_rb(ms, means, stds)
+        assert len(list(fit_cache_dir.iterdir())) == 2
@@ -0,0 +1,245 @@
+"""Tests for the shared QI fetch helpers used by the experiments/analyze_* scripts.
+
+Validates:
+1. Counts decoding (bit_matrix, pack_bitstrings) against per-character parsing
+2. The decoded-counts npz cache rejects stale or differently-decoded files
+3. Job status caching and API call counts against a fake QI backend
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(__import__("pathlib").Path(__file__).parent.parent / "experiments"))
+import qi_fetch
+from qi_fetch import (
+    bit_matrix,
+    check_status,
+    fetch_one,
+    fetch_results,
+    load_counts_npz,
+    pack_bitstrings,
+    save_counts_npz,
+    wait_for_completion,
+)
+
+
+def random_counts(rng, n_keys, width):
+    keys = {"".join(rng.choice(["0", "1"], size=width)) for _ in range(n_keys)}
+    return {k: int(rng.integers(1, 100)) for k in keys}
+
+
+# ─── Fake QI backend ────────────────────────────────────────────────────────
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeBackend:
+    """Stands in for RemoteBackend; counts every API call.
+
+    jobs maps job_id -> list of statuses; each get_job call returns the
+    current one and moves on to the next (the last one sticks). get_results
+    raises a 404 until the job's current status is COMPLETED. errors maps
+    job_id -> exception raised by every call for that job.
+    """
+
+    def __init__(self, jobs, errors=None):
+        self.jobs = jobs
+        self.errors = errors or {}
+        self.polls = {job_id: 0 for job_id in jobs}
+        self.calls = {"get_job": 0, "get_results": 0}
+
+    def _status(self, job_id):
+        statuses = self.jobs[job_id]
+        return statuses[min(self.polls[job_id], len(statuses) - 1)]
+
+    def get_job(self, job_id):
+        self.calls["get_job"] += 1
+        if job_id in self.errors:
+            raise self.errors[job_id]
+        status = self._status(job_id)
+        self.polls[job_id] += 1
+        return _Obj(status=status)
+
+    def get_results(self, job_id):
+        self.calls["get_results"] += 1
+        if job_id in self.errors:
+            raise self.errors[job_id]
+        if self._status(job_id) != "COMPLETED":
+            raise ApiError(404)
+        return _Obj(items=[_Obj(results={"00": 60, "11": 40})])
+
+
+@pytest.fixture(autouse=True)
+def fresh_status_cache(monkeypatch):
+    """Each test starts with an empty job status cache and no real backend."""
+    monkeypatch.setattr(qi_fetch, "_final_status", {})
+    monkeypatch.setattr(qi_fetch, "_backend", None)
+    monkeypatch.setattr(qi_fetch.time, "sleep", lambda seconds: None)
+
+
+# ─── Counts Decoding Tests ──────────────────────────────────────────────────
+
+class TestCountsDecoding:
+    """bit_matrix / pack_bitstrings agree with parsing keys one character at a time."""
+
+    def test_bit_matrix_matches_per_character_parse(self):
+        counts = random_counts(np.random.default_rng(1), 200, 9)
+        expected = np.array([[int(c) for c in k] for k in counts])
+        np.testing.assert_array_equal(bit_matrix(counts), expected)
+
+    def test_pack_bitstrings_matches_int_base2(self):
+        keys = list(random_counts(np.random.default_rng(2), 200, 9))
+        expected = [int(k, 2) for k in keys]
+        np.testing.assert_array_equal(pack_bitstrings(keys, 9), expected)
+
+
+# ─── Decoded Counts Cache Tests ─────────────────────────────────────────────
+
+class TestCountsNpzCache:
+    """load_counts_npz only returns what save_counts_npz stored for the same input."""
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        counts_file = tmp_path / "counts.json"
+        counts_file.write_text("{}")
+        decoded = {"qv_0": (np.array([3, 5], dtype=np.uint16), np.array([10, 20]))}
+        return counts_file, tmp_path / "counts.npz", decoded
+
+    def test_round_trip(self, files):
+        counts_file, path, decoded = files
+        save_counts_npz(decoded, path, [4, 6, 7, 8])
+        loaded = load_counts_npz(counts_file, path, [4, 6, 7, 8])
+        assert loaded.keys() == decoded.keys()
+        np.testing.assert_array_equal(loaded["qv_0"][0], decoded["qv_0"][0])
+        np.testing.assert_array_equal(loaded["qv_0"][1], decoded["qv_0"][1])
+
+    def test_missing_cache(self, files):
+        counts_file, path, _ = files
+        assert load_counts_npz(counts_file, path, [9]) is None
+
+    def test_other_layout_is_stale(self, files):
+        counts_file, path, decoded = files
+        save_counts_npz(decoded, path, [4, 6, 7, 8])
+        assert load_counts_npz(counts_file, path, [0, 1, 2, 3]) is None
+
+    def test_cache_without_layout_is_stale(self, files):
+        counts_file, path, decoded = files
+        outcomes, shots = decoded["qv_0"]
+        np.savez_compressed(path, qv_0_bs=outcomes, qv_0_v=shots)
+        assert load_counts_npz(counts_file, path, [4, 6, 7, 8]) is None
+
+    def test_older_than_counts_is_stale(self, files):
+        counts_file, path, decoded = files
+        save_counts_npz(decoded, path, [9])
+        mtime = path.stat().st_mtime
+        os.utime(counts_file, (mtime + 10, mtime + 10))
+        assert load_counts_npz(counts_file, path, [9]) is None
+
+
+# ─── Fetch / Status Tests ───────────────────────────────────────────────────
+
+class TestFetchOne:
+    """Per-job API cost and status caching of fetch_one."""
+
+    def test_completed_job_costs_one_call(self):
+        backend = FakeBackend({1: ["COMPLETED"]})
+        status, histogram, error = fetch_one(backend, 1)
+        assert (status, histogram, error) == ("COMPLETED", {"00": 60, "11": 40}, None)
+        assert backend.calls == {"get_job": 0, "get_results": 1}
+
+    def test_pending_job_costs_two_calls(self):
+        backend = FakeBackend({1: ["RUNNING"]})
+        assert fetch_one(backend, 1) == ("RUNNING", None, None)
+        assert backend.calls == {"get_job": 1, "get_results": 1}
+
+    def test_final_status_is_cached(self):
+        backend = FakeBackend({1: ["FAILED"]})
+        assert fetch_one(backend, 1)[0] == "FAILED"
+        assert fetch_one(backend, 1)[0] == "FAILED"
+        assert backend.calls == {"get_job": 1, "get_results": 1}
+
+    def test_pending_status_is_not_cached(self):
+        backend = FakeBackend({1: ["PLANNED", "COMPLETED"]})
+        assert fetch_one(backend, 1)[0] == "PLANNED"
+        assert fetch_one(backend, 1)[:2] == ("COMPLETED", {"00": 60, "11": 40})
+
+    def test_non_404_error_is_reported(self):
+        backend = FakeBackend({1: ["COMPLETED"]}, errors={1: ApiError(401)})
+        status, histogram, error = fetch_one(backend, 1)
+        assert status is None and histogram is None
+        assert error.status == 401
+        assert backend.calls == {"get_job": 0, "get_results": 1}
+
+
+class TestWaitForCompletion:
+    """wait_for_completion polls by status and fetches results once per job."""
+
+    def test_one_get_job_per_poll(self):
+        backend = FakeBackend({1: ["RUNNING", "RUNNING", "COMPLETED"], 2: ["RUNNING", "FAILED"]})
+        backend.polls = {1: 1, 2: 1}  # as left by the initial fetch
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            final = wait_for_completion(ex, backend, {"a": 1, "b": 2})
+        assert final == {"a": ("COMPLETED", {"00": 60, "11": 40}, None), "b": ("FAILED", None, None)}
+        # a: RUNNING, COMPLETED; b: FAILED
+        assert backend.calls == {"get_job": 3, "get_results": 1}
+
+    def test_errors_end_the_wait(self):
+        backend = FakeBackend({1: ["RUNNING"]}, errors={1: RuntimeError("net")})
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            final = wait_for_completion(ex, backend, {"a": 1})
+        status, histogram, error = final["a"]
+        assert status is None and histogram is None and str(error) == "net"
+
+
+class TestFetchResults:
+    """fetch_results tallies done / pending / failed jobs across a run."""
+
+    JOB_DATA = {"job_ids": {"c0": 1, "c1": 2, "c2": "FAILED: submit error", "c3": 3, "c4": 4}}
+
+    def backend(self):
+        return FakeBackend({1: ["COMPLETED"], 2: ["RUNNING", "COMPLETED"], 3: ["FAILED"],
+                            4: ["PLANNED"]})
+
+    def test_without_wait(self, monkeypatch):
+        backend = self.backend()
+        monkeypatch.setattr(qi_fetch, "_backend", backend)
+        counts, n_pending = fetch_results(self.JOB_DATA, progress_every=2)
+        assert counts == {"c0": {"00": 60, "11": 40}}
+        assert n_pending == 2
+        assert backend.calls == {"get_job": 3, "get_results": 4}
+
+    def test_with_wait(self, monkeypatch):
+        backend = self.backend()
+        backend.jobs[4] = ["PLANNED", "RUNNING", "COMPLETED"]
+        monkeypatch.setattr(qi_fetch, "_backend", backend)
+        counts, n_pending = fetch_results(self.JOB_DATA, wait=True)
+        assert sorted(counts) == ["c0", "c1", "c4"]
+        assert n_pending == 0
+
+
+class TestCheckStatus:
+    """check_status samples jobs through the status cache."""
+
+    def test_all_done(self, monkeypatch):
+        backend = FakeBackend({i: ["COMPLETED"] for i in range(12)})
+        monkeypatch.setattr(qi_fetch, "_backend", backend)
+        assert check_status({"job_ids": {f"c{i}": i for i in range(12)}})
+        assert backend.calls["get_job"] == 9
+
+    def test_pending_or_error_is_not_done(self, monkeypatch):
+        backend = FakeBackend({0: ["COMPLETED"], 1: ["RUNNING"], 2: ["COMPLETED"]},
+                              errors={2: RuntimeError("net")})
+        monkeypatch.setattr(qi_fetch, "_backend", backend)
+        assert not check_status({"job_ids": {"c0": 0, "c1": 1}})
+        assert not check_status({"job_ids": {"c0": 0, "c2": 2}})